@@ -1,9 +1,15 @@
+import os, sys
+# paquet partagé common/ : copié dans /app par le Dockerfile, dans le dossier parent en local
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from ariadne import graphql_sync, make_executable_schema, load_schema_from_path, ObjectType, QueryType, MutationType
 from flask import Flask, render_template, request, jsonify, make_response
 import requests
 import json, time
 from flask_cors import CORS
 import resolvers as r
+from graphql import GraphQLError
+from ariadne import format_error
+from common.query_cache import QueryCache, PersistedQueryNotFound, skip_validation
 import config
 
 app = Flask(__name__)
@@ -22,7 +28,11 @@ date = ObjectType('Date')
 movie = ObjectType('Movie')
 
 query.set_field('bookings_json', r.bookings_json)
+query.set_field('bookings_connection', r.bookings_connection)
 query.set_field('booking_with_id', r.booking_with_id)
+query.set_field('users_for_showing', r.users_for_showing)
+query.set_field('bookings_by_date', r.bookings_by_date)
+query.set_field('bookings_by_movie', r.bookings_by_movie)
 mutation.set_field('add_booking', r.add_booking)
 mutation.set_field('remove_booking_with_movie_date_user', r.remove_booking_with_movie_date_user)
 mutation.set_field('remove_bookings_with_user_id', r.remove_bookings_with_user_id)
@@ -31,6 +41,7 @@ booking.set_field("dates", r.resolve_booking_dates)
 date.set_field("movies", r.resolve_date_movies)
 
 schema = make_executable_schema(type_defs, query, mutation, booking, user, date, movie)
+query_cache = QueryCache(schema, max_size=config.QUERY_CACHE_SIZE)
 
 
 # page d’accueil du service
@@ -49,15 +60,42 @@ def home():
 @app.route('/graphql', methods=['POST'])
 def graphql_server():
     data = request.get_json()
+    # document analysé et validé mis en cache (ou requête persistée envoyée par hash)
+    try:
+        data, document, errors = query_cache.prepare(data)
+    except PersistedQueryNotFound as error:
+        return jsonify({"errors": [format_error(error)]}), 200
+    except GraphQLError as error:
+        return jsonify({"errors": [format_error(error, app.debug)]}), 400
+    if errors:
+        return jsonify({"errors": [format_error(error, app.debug) for error in errors]}), 400
+
     success, result = graphql_sync(
                         schema,
                         data,
-                        context_value=None,
+                        context_value=r.build_context(),
+                        query_document=document,
+                        query_validator=skip_validation,
                         debug=app.debug
                     )
     status_code = 200 if success else 400
     return jsonify(result), status_code
 
+# compteurs du cache de requêtes GraphQL
+@app.route('/graphql/cache', methods=['GET'])
+def graphql_cache_stats():
+    return jsonify(query_cache.stats()), 200
+
+# compteurs du cache de vérification admin
+@app.route('/admin_cache', methods=['GET'])
+def admin_cache_stats():
+    return jsonify(r.admin_cache.stats()), 200
+
+# compteurs du client HTTP vers les autres services
+@app.route('/http_client', methods=['GET'])
+def http_client_stats():
+    return jsonify(r.http.stats()), 200
+
 if __name__ == "__main__":
    print("Server running in port %s"%(config.BOOKING_PORT))
    app.run(host=config.BOOKING_HOST, port=config.BOOKING_PORT)
@@ -29,4 +29,38 @@ SCHEDULE_GRPC_URL = f"{SCHEDULE_HOST}:{SCHEDULE_PORT}"
 BOOKING_HOST = 'booking' if USE_DOCKER else 'localhost'
 BOOKING_PORT = int(os.getenv('BOOKING_PORT', 3203))
 
-CACHE_TTL = int(os.getenv('CACHE_TTL', 60))  # Time-to-live en secondes
\ No newline at end of file
+CACHE_TTL = int(os.getenv('CACHE_TTL', 60))  # Time-to-live en secondes
+ADMIN_CACHE_SIZE = int(os.getenv('ADMIN_CACHE_SIZE', 10000))  # nombre max d'utilisateurs en cache
+ADMIN_CACHE_NEGATIVE_TTL = int(os.getenv('ADMIN_CACHE_NEGATIVE_TTL', 10))  # TTL des utilisateurs inconnus
+ADMIN_CACHE_REFRESH_AHEAD = float(os.getenv('ADMIN_CACHE_REFRESH_AHEAD', 0.8))  # fraction du TTL avant rechargement
+ADMIN_CACHE_BATCH_WINDOW = float(os.getenv('ADMIN_CACHE_BATCH_WINDOW', 0.005))  # secondes pour regrouper les vérifications (0 = une requête par utilisateur)
+ADMIN_CACHE_BATCH_SIZE = int(os.getenv('ADMIN_CACHE_BATCH_SIZE', 100))  # utilisateurs max par requête groupée
+USER_BATCH_SIZE = int(os.getenv('USER_BATCH_SIZE', 1000))  # utilisateurs max par appel à /<user_id>/users/profiles:batch
+# Utilisateur (admin) sous lequel le service lit les profils des réservations auprès de User
+SERVICE_USER_ID = os.getenv('SERVICE_USER_ID', 'chris_rivers')
+
+# Résolution GraphQL : appels à User et Movie lancés en parallèle dès que les réservations sont connues
+CONCURRENT_FANOUT = os.getenv('CONCURRENT_FANOUT', 'true').lower() == 'true'
+USER_CONCURRENCY = int(os.getenv('USER_CONCURRENCY', 8))  # appels simultanés max vers le service User
+MOVIE_CONCURRENCY = int(os.getenv('MOVIE_CONCURRENCY', 8))  # appels simultanés max vers le service Movie
+MOVIE_BATCH_SIZE = int(os.getenv('MOVIE_BATCH_SIZE', 500))  # films max par appel à movies_by_ids
+
+# Appels HTTP entre services : délais (secondes), tentatives des lectures et taille du pool par hôte
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 1.0))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 5.0))
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 2))
+HTTP_RETRY_BACKOFF = float(os.getenv('HTTP_RETRY_BACKOFF', 0.05))
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 20))
+
+# Jetons signés (HMAC) acceptés à la place de user_id : clés "kid:secret" séparées par des virgules.
+# Toutes les clés listées sont acceptées, ce qui permet de les faire tourner sans interruption.
+TOKEN_KEYS = os.getenv('TOKEN_KEYS', '')
+
+# Nombre maximal de documents GraphQL analysés et validés gardés en cache
+QUERY_CACHE_SIZE = int(os.getenv('QUERY_CACHE_SIZE', 1000))
+
+# Stockage : backend "json" (instantané + journal, tout en mémoire) ou "sqlite" (base embarquée)
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'json')
+
+# Stockage : nombre de mutations journalisées avant l'écriture d'un nouvel instantané
+STORAGE_COMPACT_EVERY = int(os.getenv('STORAGE_COMPACT_EVERY', 1000))
@@ -0,0 +1,84 @@
+# clé dont le chargement a été lancé en arrière-plan (`prefetch`) et n'est pas encore terminé
+_IN_FLIGHT = object()
+
+
+class DataLoader:
+    """
+    Chargeur groupé (inspiré de DataLoader) propre à une requête GraphQL.
+
+    Les résolveurs racines annoncent à l'avance les clés dont l'exécution
+    aura besoin (`want`). Au premier `load`, toutes les clés en attente sont
+    dédupliquées et récupérées en un seul appel à `batch_load_fn`, qui reçoit
+    une liste de clés et retourne un dict { clé: valeur }.
+    Les clés absentes du résultat valent None. Si l'appel groupé échoue,
+    l'erreur est mémorisée pour chaque clé et relevée à chaque `load`, pour
+    ne pas relancer un appel par champ.
+
+    Avec un `executor`, `prefetch` lance tout de suite les appels des clés
+    annoncées, par paquets d'au plus `max_batch_size` clés, sans attendre le
+    premier `load` : les chargeurs de différents services (et les paquets
+    d'un même service) sont alors appelés en parallèle. La taille du pool de
+    l'executor borne le nombre d'appels simultanés vers ce service.
+    """
+
+    def __init__(self, batch_load_fn, executor=None, max_batch_size=None):
+        self.batch_load_fn = batch_load_fn
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self._cache = {}
+        self._pending = {}  # dict utilisé comme ensemble ordonné
+        self._in_flight = []  # (clés, future) lancés par prefetch
+
+    def want(self, keys):
+        """Annonce des clés qui seront chargées plus tard (sans appel réseau)."""
+        for key in keys:
+            if key not in self._cache:
+                self._pending[key] = None
+
+    def prefetch(self):
+        """Lance en arrière-plan le chargement des clés en attente (sans effet sans executor)."""
+        if self.executor is None or not self._pending:
+            return
+        keys = list(self._pending)
+        self._pending.clear()
+        size = self.max_batch_size or len(keys)
+        for i in range(0, len(keys), size):
+            chunk = keys[i:i + size]
+            self._cache.update(dict.fromkeys(chunk, _IN_FLIGHT))
+            self._in_flight.append((chunk, self.executor.submit(self.batch_load_fn, chunk)))
+
+    def load(self, key):
+        return self.load_many([key])[0]
+
+    def load_many(self, keys):
+        self.want(keys)
+        if self._in_flight:
+            self._collect()
+        if self._pending:
+            self.dispatch()
+        values = [self._cache.get(key) for key in keys]
+        for value in values:
+            if isinstance(value, Exception):
+                raise value
+        return values
+
+    def dispatch(self):
+        keys = list(self._pending)
+        self._pending.clear()
+        try:
+            results = self.batch_load_fn(keys)
+        except Exception as e:
+            results = dict.fromkeys(keys, e)
+        for key in keys:
+            self._cache[key] = results.get(key)
+
+    def _collect(self):
+        """Attend les chargements lancés par prefetch et range leurs résultats."""
+        in_flight, self._in_flight = self._in_flight, []
+        for keys, future in in_flight:
+            try:
+                results = future.result()
+            except Exception as e:
+                results = dict.fromkeys(keys, e)
+            for key in keys:
+                self._cache[key] = results.get(key)
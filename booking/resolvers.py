@@ -1,94 +1,286 @@
-import json
-from graphql import GraphQLError
-import requests, time, grpc
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from graphql import FieldNode, FragmentSpreadNode, GraphQLError
+import requests, grpc
 import config
 
 from schedule_client import get_schedule_client
+from loaders import DataLoader
+from common.storage import open_store
+from common.admin_cache import AdminCache, UserNotFound
+from common.http_client import HttpClient
+from common.tokens import InvalidToken, is_token, parse_keys, verify_token
+from common.query_cache import query_hash
+from common.pagination import DEFAULT_PAGE_SIZE, keyset_page, connection
 import schedule_pb2
 
-user_admin_cache = {}  # format: { user_id: { "is_admin": bool, "timestamp": float } }
-
 # Client gRPC Schedule
 schedule = get_schedule_client()
 
+# client HTTP partagé : connexions keep-alive par hôte, délais et nouvelles tentatives
+http = HttpClient(
+    connect_timeout=config.HTTP_CONNECT_TIMEOUT,
+    read_timeout=config.HTTP_READ_TIMEOUT,
+    retries=config.HTTP_RETRIES,
+    backoff=config.HTTP_RETRY_BACKOFF,
+    pool_size=config.HTTP_POOL_SIZE,
+)
+
+# cache partagé du statut admin (LRU + TTL, un seul appel au service User par utilisateur)
+def fetch_is_admin(user_id):
+    """Interroge le service User ; lève UserNotFound si l'utilisateur n'existe pas."""
+    r = http.get(f"{config.USER_BASE_URL}/users/{user_id}/is_admin")
+    if r.status_code == 404:
+        raise UserNotFound(user_id)
+    r.raise_for_status()
+    return r.json().get("is_admin", False)
+
+def fetch_is_admin_many(user_ids):
+    """Interroge le service User pour plusieurs utilisateurs ; les inconnus sont absents du résultat."""
+    r = http.post(f"{config.USER_BASE_URL}/users/is_admin:batch", idempotent=True, json={"ids": user_ids})
+    r.raise_for_status()
+    return r.json()["is_admin"]
+
+admin_cache = AdminCache(
+    fetch_is_admin,
+    ttl=config.CACHE_TTL,
+    max_size=config.ADMIN_CACHE_SIZE,
+    negative_ttl=config.ADMIN_CACHE_NEGATIVE_TTL,
+    refresh_ahead=config.ADMIN_CACHE_REFRESH_AHEAD,
+    fetch_many=fetch_is_admin_many if config.ADMIN_CACHE_BATCH_WINDOW > 0 else None,
+    batch_window=config.ADMIN_CACHE_BATCH_WINDOW,
+    batch_size=config.ADMIN_CACHE_BATCH_SIZE,
+)
+
+# clés de vérification des jetons signés par le service User
+token_keys = parse_keys(config.TOKEN_KEYS)
+
 def verify_admin(user_id):
     """
     Vérifie si user_id est admin, avec cache.
     Retourne (is_admin, None) ou lève GraphQLError en cas d'erreur de contact.
     """
-    now = time.time()
-    if user_id in user_admin_cache:
-        cached = user_admin_cache[user_id]
-        if now - cached["timestamp"] < config.CACHE_TTL:
-            return cached["is_admin"], None
-
+    # jeton signé : vérifié localement, sans appel au service User
+    if is_token(user_id):
+        try:
+            return verify_token(user_id, token_keys)[1], None
+        except InvalidToken as e:
+            raise GraphQLError(f"Invalid token: {e}")
     try:
-        r = requests.get(f"{config.USER_BASE_URL}/users/{user_id}/is_admin")
-        if r.status_code == 200:
-            data = r.json()
-            is_admin = data.get("is_admin", False)
-            user_admin_cache[user_id] = {"is_admin": is_admin, "timestamp": now}
-            return is_admin, None
-        else:
-            raise GraphQLError("Unable to verify user")
+        return admin_cache.get(user_id), None
+    except (UserNotFound, requests.exceptions.HTTPError):
+        raise GraphQLError("Unable to verify user")
     except requests.exceptions.RequestException:
         raise GraphQLError("User service unsearchable")
 
-with open('{}/databases/bookings.json'.format("."), "r") as jsf:
-    bookings = json.load(jsf)["bookings"]
-    
-def write(bookings_data):
-    with open('{}/databases/bookings.json'.format("."), 'w') as f:
-        full = {}
-        full['bookings'] = bookings_data
-        json.dump(full, f)
+def showing_key(date, movieid):
+    """Clé d'une séance (date, film) dans l'index "showing"."""
+    return f"{date}|{movieid}"
 
-def resolve_booking_userid(booking, info):
-    user_id = booking["userid"]
+# index secondaires déclarés au stockage (la clé primaire est userid) :
+# date, film et séance (date, film) -> utilisateurs qui les ont réservés
+BOOKING_INDEXES = {
+    "date": lambda b: [d["date"] for d in b["dates"] if d["movies"]],
+    "movie": lambda b: [movieid for d in b["dates"] for movieid in d["movies"]],
+    "showing": lambda b: [showing_key(d["date"], movieid) for d in b["dates"] for movieid in d["movies"]],
+}
+
+# stockage choisi dans config.py (STORAGE_BACKEND) : JSON + journal, ou SQLite
+store = open_store(
+    config.STORAGE_BACKEND, './databases/bookings.json', 'bookings', key='userid',
+    indexes=BOOKING_INDEXES, compact_every=config.STORAGE_COMPACT_EVERY
+)
+
+# les mutations d'une même réservation (vérification, lecture, écriture) sont sérialisées par un
+# verrou tiré d'un tableau fixe, choisi par hachage du userid ; deux userid différents s'écrivent en parallèle
+BOOKING_LOCK_STRIPES = 64
+_booking_locks = [threading.Lock() for _ in range(BOOKING_LOCK_STRIPES)]
+
+def booking_lock(userid):
+    return _booking_locks[zlib.crc32(str(userid).encode()) % BOOKING_LOCK_STRIPES]
+
+def has_showing(userid, date, movieid):
+    """Vrai si userid a réservé movieid à cette date (lecture de l'index, sans charger la réservation)."""
+    return store.contains("showing", showing_key(date, movieid), userid)
+
+def with_movie(booking, date, movieid):
+    """
+    Copie de la réservation avec movieid ajouté à cette date : l'enregistrement
+    stocké n'est jamais modifié en place, les lecteurs concurrents voient
+    l'ancienne ou la nouvelle version.
+    """
+    dates = [dict(d, movies=d["movies"] + [movieid]) if d["date"] == date else d for d in booking["dates"]]
+    if not any(d["date"] == date for d in booking["dates"]):
+        dates.append({"date": date, "movies": [movieid]})
+    return dict(booking, dates=dates)
+
+def without_movie(booking, date, movieid):
+    """Copie de la réservation sans movieid à cette date ; une date sans film est retirée."""
+    dates = []
+    for d in booking["dates"]:
+        if d["date"] == date:
+            d = dict(d, movies=[m for m in d["movies"] if m != movieid])
+            if not d["movies"]:
+                continue
+        dates.append(d)
+    return dict(booking, dates=dates)
+
+def restrict(booking, date=None, movieid=None):
+    """Réservation réduite à une date et/ou un film, pour les vues par séance."""
+    dates = []
+    for d in booking["dates"]:
+        if date is not None and d["date"] != date:
+            continue
+        movies = d["movies"] if movieid is None else [m for m in d["movies"] if m == movieid]
+        if movies:
+            dates.append({"date": d["date"], "movies": movies})
+    return dict(booking, dates=dates)
 
+def fetch_users(user_ids):
+    """
+    Récupère les utilisateurs demandés en un seul appel au service User.
+    L'appel est fait au nom du service (SERVICE_USER_ID, admin) : lire une
+    réservation n'exige pas d'être admin, alors que la route des profils l'exige.
+    Retourne un dict { user_id: user }.
+    """
+    users = {}
     try:
-        # Appel au service User pour récupérer les détails (en simulant admin pour avoir les droits)
-        r = requests.get(f"{config.USER_BASE_URL}/chris_rivers/users/{user_id}")
-        if r.status_code == 200:
-            return r.json()
-        raise GraphQLError(f"User not found: {user_id}")
-    except requests.exceptions.RequestException:
+        # par paquets de la taille acceptée par le service User
+        for i in range(0, len(user_ids), config.USER_BATCH_SIZE):
+            r = http.post(
+                f"{config.USER_BASE_URL}/{config.SERVICE_USER_ID}/users/profiles:batch",
+                idempotent=True,
+                json={"ids": user_ids[i:i + config.USER_BATCH_SIZE]}
+            )
+            r.raise_for_status()
+            users.update(r.json()["users"])
+    except (requests.exceptions.RequestException, ValueError, KeyError):
         raise GraphQLError("User service unreachable")
+    return users
+
+MOVIES_BY_IDS_QUERY = """
+query($user_id: String!, $ids: [String!]!) {
+    movies_by_ids(user_id: $user_id, ids: $ids) {
+        id
+        title
+        director
+        rating
+    }
+}
+"""
+
+def post_persisted_query(url, query, variables):
+    """
+    Envoie une requête GraphQL persistée (APQ) : seul le hash de la requête
+    est transmis, le texte complet n'est renvoyé que si le serveur ne le
+    connaît pas encore.
+    """
+    extensions = {"persistedQuery": {"version": 1, "sha256Hash": query_hash(query)}}
+    data = http.post(url, idempotent=True, json={"variables": variables, "extensions": extensions}).json()
+    errors = data.get("errors") or []
+    if any((e.get("extensions") or {}).get("code") == "PERSISTED_QUERY_NOT_FOUND" for e in errors):
+        data = http.post(
+            url, idempotent=True, json={"query": query, "variables": variables, "extensions": extensions}
+        ).json()
+    return data
+
+def fetch_movies(user_id, movie_ids):
+    """
+    Récupère les films demandés en une seule requête `movies_by_ids` au
+    service Movie. Retourne un dict { movie_id: movie }.
+    Les films inexistants valent None.
+    """
+    try:
+        data = post_persisted_query(
+            f"{config.MOVIE_BASE_URL}/graphql",
+            MOVIES_BY_IDS_QUERY,
+            {"user_id": user_id, "ids": movie_ids}
+        )
+    except (requests.exceptions.RequestException, ValueError) as e:
+        raise GraphQLError(f"Movie service unreachable or invalid JSON: {e}")
+
+    movies_found = (data.get("data") or {}).get("movies_by_ids")
+    if movies_found is None:
+        raise GraphQLError(f"Invalid movie service response: {data}")
+    return dict(zip(movie_ids, movies_found))
+
+# un pool de threads par service appelé, partagé par toutes les requêtes :
+# sa taille borne le nombre d'appels simultanés vers ce service
+if config.CONCURRENT_FANOUT:
+    user_pool = ThreadPoolExecutor(max_workers=config.USER_CONCURRENCY, thread_name_prefix="user-fanout")
+    movie_pool = ThreadPoolExecutor(max_workers=config.MOVIE_CONCURRENCY, thread_name_prefix="movie-fanout")
+else:
+    user_pool = movie_pool = None
+
+def build_context():
+    """
+    Contexte propre à une exécution GraphQL : chargeurs groupés des
+    utilisateurs et des films, partagés par tous les résolveurs imbriqués.
+    """
+    context = {"user_id": None}
+    context["users"] = DataLoader(fetch_users, executor=user_pool, max_batch_size=config.USER_BATCH_SIZE)
+    context["movies"] = DataLoader(
+        lambda movie_ids: fetch_movies(context["user_id"], movie_ids),
+        executor=movie_pool,
+        max_batch_size=config.MOVIE_BATCH_SIZE,
+    )
+    return context
+
+def selected_fields(info):
+    """Noms de tous les champs demandés sous le champ racine, fragments compris."""
+    names = set()
+
+    def walk(selection_set):
+        if selection_set is None:
+            return
+        for selection in selection_set.selections:
+            if isinstance(selection, FragmentSpreadNode):
+                walk(info.fragments[selection.name.value].selection_set)
+                continue
+            if isinstance(selection, FieldNode):
+                names.add(selection.name.value)
+            walk(selection.selection_set)
+
+    for node in info.field_nodes:
+        walk(node.selection_set)
+    return names
+
+def prime_loaders(info, user_id, bookings_list, prefetch=True):
+    """
+    Annonce aux chargeurs les utilisateurs et films référencés par les
+    réservations retournées, pour qu'ils soient récupérés en un seul appel
+    chacun au premier champ imbriqué résolu. Seuls les chargeurs dont la
+    requête demande les champs (`userid`, `movies`) sont concernés.
+    Avec CONCURRENT_FANOUT et `prefetch`, leurs appels à User et à Movie
+    partent tout de suite, en parallèle : la résolution à froid attend le
+    plus lent des appels et non leur somme.
+    """
+    info.context["user_id"] = user_id
+    fields = selected_fields(info)
+    if "userid" in fields:
+        info.context["users"].want(b["userid"] for b in bookings_list)
+        if prefetch:
+            info.context["users"].prefetch()
+    if "movies" in fields:
+        info.context["movies"].want(
+            movieid for b in bookings_list for d in b["dates"] for movieid in d["movies"]
+        )
+        if prefetch:
+            info.context["movies"].prefetch()
+
+def resolve_booking_userid(booking, info):
+    user_id = booking["userid"]
+    user = info.context["users"].load(user_id)
+    if user is None:
+        raise GraphQLError(f"User not found: {user_id}")
+    return user
 
 def resolve_booking_dates(booking, info):
-    dates_to_return = []
-    for date in booking["dates"]:
-        date["user_id"] = booking["userid"]
-        dates_to_return.append(date)
-    return dates_to_return
+    return booking["dates"]
 
 def resolve_date_movies(date, info):
-    user_id = date["user_id"]
-    movies_to_return = []
-    for movieid in date["movies"]:
-        query = f"""
-        {{
-            movie_with_id(user_id: "{user_id}", id: "{movieid}") {{
-                id
-                title
-                director
-                rating
-            }}
-        }}
-        """
-        try:
-            response = requests.post(f"{config.MOVIE_BASE_URL}/graphql", json={'query': query})
-            response.raise_for_status()
-            data = response.json()
-
-            if "data" in data and "movie_with_id" in data["data"]:
-                movie_details = data["data"]["movie_with_id"]
-                movies_to_return.append(movie_details)
-            else:
-                raise GraphQLError(f"Invalid movie service response for id {movieid}: {data}")
-        except (requests.exceptions.RequestException, ValueError) as e:
-            raise GraphQLError(f"Movie service unreachable or invalid JSON: {e}")
-    return movies_to_return
+    return info.context["movies"].load_many(date["movies"])
 
 
 # Lecture -> on exige que le service User soit joignable (verify_admin appelé), mais on n'impose pas le role admin
@@ -96,6 +288,47 @@ def bookings_json(_, info, user_id):
     _, error = verify_admin(user_id)
     if error:
         return error
+    bookings = store.records()
+    prime_loaders(info, user_id, bookings)
+    return bookings
+
+# Lecture paginée -> seules les réservations de la page sont résolues
+def bookings_connection(_, info, user_id, first=DEFAULT_PAGE_SIZE, after=None):
+    """
+    Liste paginée par curseur (Relay) des réservations, triées par userid.
+    Le curseur encode le dernier userid vu : il reste valide malgré les
+    ajouts et suppressions concurrents.
+    """
+    _, error = verify_admin(user_id)
+    if error:
+        return error
+    page, has_next_page = keyset_page(store, first, after)
+    prime_loaders(info, user_id, page)
+    return connection(page, has_next_page, "userid", len(store))
+
+# Utilisateurs ayant réservé une séance -> lecture de l'index, sans résoudre utilisateurs ni films
+def users_for_showing(_, info, user_id, date, movieid):
+    _, error = verify_admin(user_id)
+    if error:
+        return error
+    return [b["userid"] for b in store.find("showing", showing_key(date, movieid))]
+
+# Réservations d'une date -> lecture de l'index "date", réduites à cette date, triées par userid
+def bookings_by_date(_, info, user_id, date):
+    _, error = verify_admin(user_id)
+    if error:
+        return error
+    bookings = [restrict(b, date=date) for b in sorted(store.find("date", date), key=lambda b: b["userid"])]
+    prime_loaders(info, user_id, bookings)
+    return bookings
+
+# Réservations d'un film -> lecture de l'index "movie", réduites aux dates de ce film
+def bookings_by_movie(_, info, user_id, movieid):
+    _, error = verify_admin(user_id)
+    if error:
+        return error
+    bookings = [restrict(b, movieid=movieid) for b in sorted(store.find("movie", movieid), key=lambda b: b["userid"])]
+    prime_loaders(info, user_id, bookings)
     return bookings
 
 # Lecture par id -> idem
@@ -103,10 +336,11 @@ def booking_with_id(_, info, user_id, id):
     _, error = verify_admin(user_id)
     if error:
         return error
-    for booking in bookings:
-        if booking["userid"] == id:
-            return booking
-    raise GraphQLError("Booking not found with id: " + id)
+    booking = store.get(id)
+    if booking is None:
+        raise GraphQLError("Booking not found with id: " + id)
+    prime_loaders(info, user_id, [booking])
+    return booking
 
 # Mutations nécessitent un admin
 def add_booking(_, info, user_id, userid, date, movieid):
@@ -116,48 +350,36 @@ def add_booking(_, info, user_id, userid, date, movieid):
     if not is_admin:
         raise GraphQLError("Unauthorized: admin access required")
 
-    # Vérifie auprès de Schedule que le film est dispo à cette date
+    # premier contrôle sans verrou, pour ne pas appeler Schedule inutilement
+    if has_showing(userid, date, movieid):
+        raise GraphQLError("Booking already exists")
+
+    # Vérifie auprès de Schedule que le film est dispo à cette date (lecture de l'index, sans détails des films)
     try:
-        response = schedule.GetMoviesByDate(
-            schedule_pb2.GetMoviesByDateRequest(
+        response = schedule.IsScheduled(
+            schedule_pb2.IsScheduledRequest(
                 userId=user_id,
-                date=str(date)
+                date=str(date),
+                movieId=movieid
             )
         )
-        movie_ids = [m.id for m in response.movies]
-        if movieid not in movie_ids:
+        if not response.scheduled:
             raise GraphQLError("Movie not scheduled on this date")
 
     except grpc.RpcError as e:
         raise GraphQLError(f"Schedule service error: {e.details()}")
 
-    # si l’utilisateur existe déjà
-    for b in bookings:
-        if b["userid"] == userid:
-            for d in b["dates"]:
-                if d["date"] == date:
-                    if movieid in d["movies"]:
-                        raise GraphQLError("Booking already exists")
-                    d["movies"].append(movieid)
-                    write(bookings)
-                    return b
-            # sinon nouvelle date pour l’utilisateur
-            b["dates"].append({"date": date, "movies": [movieid]})
-            write(bookings)
-            return b
-
-    # si l’utilisateur n’existe pas encore -> on le crée
-    newbooking = {
-        "userid": userid,
-        "dates": [
-            {
-                "date": date, "movies": [movieid]
-            }
-        ]
-    }
-    bookings.append(newbooking)
-    write(bookings)
-    return newbooking
+    # film ajouté à la date existante, ou nouvelle date, ou nouvel utilisateur
+    # mutation : pas de préchargement, les champs imbriqués demandés sont chargés à leur résolution
+    with booking_lock(userid):
+        # revérifié sous le verrou : une réservation concurrente a pu être ajoutée pendant l'appel à Schedule
+        if has_showing(userid, date, movieid):
+            raise GraphQLError("Booking already exists")
+        b = store.get(userid) or {"userid": userid, "dates": []}
+        b = with_movie(b, date, movieid)
+        store.put(b)
+    prime_loaders(info, user_id, [b], prefetch=False)
+    return b
 
 def remove_booking_with_movie_date_user(_, info, user_id, userid, date, movieid):
     is_admin, error = verify_admin(user_id)
@@ -166,16 +388,15 @@ def remove_booking_with_movie_date_user(_, info, user_id, userid, date, movieid)
     if not is_admin:
         raise GraphQLError("Unauthorized: admin access required")
 
-    for b in bookings:
-        if b["userid"] == userid:
-            for d in b["dates"]:
-                if d["date"] == date:
-                    if movieid in d["movies"]:
-                        d["movies"].remove(movieid)
-                        write(bookings)
-                        return b
-                    raise GraphQLError("Movie not found in this booking")
-    raise GraphQLError("Booking not found")
+    with booking_lock(userid):
+        if not store.contains("date", date, userid):
+            raise GraphQLError("Booking not found")
+        if not has_showing(userid, date, movieid):
+            raise GraphQLError("Movie not found in this booking")
+        b = without_movie(store.get(userid), date, movieid)
+        store.put(b)
+    prime_loaders(info, user_id, [b], prefetch=False)
+    return b
 
 def remove_bookings_with_user_id(_, info, user_id, userid):
     is_admin, error = verify_admin(user_id)
@@ -184,11 +405,8 @@ def remove_bookings_with_user_id(_, info, user_id, userid):
     if not is_admin:
         raise GraphQLError("Unauthorized: admin access required")
 
-    global bookings
-    new_bookings = [b for b in bookings if b["userid"] != userid]
-    if len(new_bookings) == len(bookings):
-        raise GraphQLError("User not found")
-
-    bookings = new_bookings
-    write(bookings)
+    with booking_lock(userid):
+        if store.get(userid) is None:
+            raise GraphQLError("User not found")
+        store.delete(userid)
     return (f"All bookings removed for userid : {userid}")
\ No newline at end of file
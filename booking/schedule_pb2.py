@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0eschedule.proto\"\x18\n\x06UserId\x12\x0e\n\x06userId\x18\x01 \x01(\t\"6\n\x16GetMoviesByDateRequest\x12\x0e\n\x06userId\x18\x01 \x01(\t\x12\x0c\n\x04\x64\x61te\x18\x02 \x01(\t\"<\n\x19GetScheduleByMovieRequest\x12\x0e\n\x06userId\x18\x01 \x01(\t\x12\x0f\n\x07movieId\x18\x02 \x01(\t\"D\n\x12\x41\x64\x64ScheduleRequest\x12\x0e\n\x06userId\x18\x01 \x01(\t\x12\x0c\n\x04\x64\x61te\x18\x02 \x01(\t\x12\x10\n\x08moviesId\x18\x03 \x03(\t\"8\n\x0cScheduleData\x12\x0c\n\x04\x64\x61te\x18\x01 \x01(\t\x12\x1a\n\x06movies\x18\x02 \x03(\x0b\x32\n.MovieData\"H\n\tMovieData\x12\r\n\x05title\x18\x01 \x01(\t\x12\x0e\n\x06rating\x18\x02 \x01(\x02\x12\x10\n\x08\x64irector\x18\x03 \x01(\t\x12\n\n\x02id\x18\x04 \x01(\t\"\x19\n\x08\x44\x61teData\x12\r\n\x05\x64\x61tes\x18\x01 \x03(\t\"\x07\n\x05\x45mpty2\xef\x02\n\x08Schedule\x12#\n\x07GetJson\x12\x07.UserId\x1a\r.ScheduleData0\x01\x12\x39\n\x0fGetMoviesByDate\x12\x17.GetMoviesByDateRequest\x1a\r.ScheduleData\x12;\n\x12GetScheduleByMovie\x12\x1a.GetScheduleByMovieRequest\x1a\t.DateData\x12\x31\n\x0b\x41\x64\x64Schedule\x12\x13.AddScheduleRequest\x1a\r.ScheduleData\x12\x34\n\x0e\x41\x64\x64MovieToDate\x12\x13.AddScheduleRequest\x1a\r.ScheduleData\x12)\n\nDeleteDate\x12\x13.AddScheduleRequest\x1a\x06.Empty\x12\x32\n\x13\x44\x65leteMovieFromDate\x12\x13.AddScheduleRequest\x1a\x06.Emptyb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x0eschedule.proto\"\x18\n\x06UserId\x12\x0e\n\x06userId\x18\x01 \x01(\t\"G\n\x16GetMoviesByDateRequest\x12\x0e\n\x06userId\x18\x01 \x01(\t\x12\x0c\n\x04\x64\x61te\x18\x02 \x01(\t\x12\x0f\n\x07idsOnly\x18\x03 \x01(\x08\"<\n\x19GetScheduleByMovieRequest\x12\x0e\n\x06userId\x18\x01 \x01(\t\x12\x0f\n\x07movieId\x18\x02 \x01(\t\"\x85\x01\n\x17GetScheduleRangeRequest\x12\x0e\n\x06userId\x18\x01 \x01(\t\x12\x11\n\tstartDate\x18\x02 \x01(\t\x12\x0f\n\x07\x65ndDate\x18\x03 \x01(\t\x12\x10\n\x08pageSize\x18\x04 \x01(\x05\x12\x13\n\x0bresumeToken\x18\x05 \x01(\t\x12\x0f\n\x07idsOnly\x18\x06 \x01(\x08\"C\n\x12IsScheduledRequest\x12\x0e\n\x06userId\x18\x01 \x01(\t\x12\x0c\n\x04\x64\x61te\x18\x02 \x01(\t\x12\x0f\n\x07movieId\x18\x03 \x01(\t\"(\n\x13IsScheduledResponse\x12\x11\n\tscheduled\x18\x01 \x01(\x08\"D\n\x12\x41\x64\x64ScheduleRequest\x12\x0e\n\x06userId\x18\x01 \x01(\t\x12\x0c\n\x04\x64\x61te\x18\x02 \x01(\t\x12\x10\n\x08moviesId\x18\x03 \x03(\t\"X\n\x15ImportScheduleRequest\x12\x0e\n\x06userId\x18\x01 \x01(\t\x12\x0c\n\x04\x64\x61te\x18\x02 \x01(\t\x12\x10\n\x08moviesId\x18\x03 \x03(\t\x12\x0f\n\x07replace\x18\x04 \x01(\x08\"\x80\x01\n\x15ImportScheduleSummary\x12\x0f\n\x07\x65ntries\x18\x01 \x01(\x05\x12\x14\n\x0c\x64\x61tesCreated\x18\x02 \x01(\x05\x12\x14\n\x0c\x64\x61tesUpdated\x18\x03 \x01(\x05\x12\x13\n\x0bmoviesAdded\x18\x04 \x01(\x05\x12\x15\n\rmoviesSkipped\x18\x05 \x01(\x05\"M\n\x0cScheduleData\x12\x0c\n\x04\x64\x61te\x18\x01 \x01(\t\x12\x1a\n\x06movies\x18\x02 \x03(\x0b\x32\n.MovieData\x12\x13\n\x0bresumeToken\x18\x03 \x01(\t\"H\n\tMovieData\x12\r\n\x05title\x18\x01 \x01(\t\x12\x0e\n\x06rating\x18\x02 \x01(\x02\x12\x10\n\x08\x64irector\x18\x03 \x01(\t\x12\n\n\x02id\x18\x04 \x01(\t\"\x19\n\x08\x44\x61teData\x12\r\n\x05\x64\x61tes\x18\x01 \x03(\t\"\x07\n\x05\x45mpty2\xac\x04\n\x08Schedule\x12#\n\x07GetJson\x12\x07.UserId\x1a\r.ScheduleData0\x01\x12\x39\n\x0fGetMoviesByDate\x12\x17.GetMoviesByDateRequest\x1a\r.ScheduleData\x12;\n\x12GetScheduleByMovie\x12\x1a.GetScheduleByMovieRequest\x1a\t.DateData\x12=\n\x10GetScheduleRange\x12\x18.GetScheduleRangeRequest\x1a\r.ScheduleData0\x01\x12\x38\n\x0bIsScheduled\x12\x13.IsScheduledRequest\x1a\x14.IsScheduledResponse\x12\x31\n\x0b\x41\x64\x64Schedule\x12\x13.AddScheduleRequest\x1a\r.ScheduleData\x12\x34\n\x0e\x41\x64\x64MovieToDate\x12\x13.AddScheduleRequest\x1a\r.ScheduleData\x12\x42\n\x0eImportSchedule\x12\x16.ImportScheduleRequest\x1a\x16.ImportScheduleSummary(\x01\x12)\n\nDeleteDate\x12\x13.AddScheduleRequest\x1a\x06.Empty\x12\x32\n\x13\x44\x65leteMovieFromDate\x12\x13.AddScheduleRequest\x1a\x06.Emptyb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -34,19 +34,29 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_USERID']._serialized_start=18
   _globals['_USERID']._serialized_end=42
   _globals['_GETMOVIESBYDATEREQUEST']._serialized_start=44
-  _globals['_GETMOVIESBYDATEREQUEST']._serialized_end=98
-  _globals['_GETSCHEDULEBYMOVIEREQUEST']._serialized_start=100
-  _globals['_GETSCHEDULEBYMOVIEREQUEST']._serialized_end=160
-  _globals['_ADDSCHEDULEREQUEST']._serialized_start=162
-  _globals['_ADDSCHEDULEREQUEST']._serialized_end=230
-  _globals['_SCHEDULEDATA']._serialized_start=232
-  _globals['_SCHEDULEDATA']._serialized_end=288
-  _globals['_MOVIEDATA']._serialized_start=290
-  _globals['_MOVIEDATA']._serialized_end=362
-  _globals['_DATEDATA']._serialized_start=364
-  _globals['_DATEDATA']._serialized_end=389
-  _globals['_EMPTY']._serialized_start=391
-  _globals['_EMPTY']._serialized_end=398
-  _globals['_SCHEDULE']._serialized_start=401
-  _globals['_SCHEDULE']._serialized_end=768
+  _globals['_GETMOVIESBYDATEREQUEST']._serialized_end=115
+  _globals['_GETSCHEDULEBYMOVIEREQUEST']._serialized_start=117
+  _globals['_GETSCHEDULEBYMOVIEREQUEST']._serialized_end=177
+  _globals['_GETSCHEDULERANGEREQUEST']._serialized_start=180
+  _globals['_GETSCHEDULERANGEREQUEST']._serialized_end=313
+  _globals['_ISSCHEDULEDREQUEST']._serialized_start=315
+  _globals['_ISSCHEDULEDREQUEST']._serialized_end=382
+  _globals['_ISSCHEDULEDRESPONSE']._serialized_start=384
+  _globals['_ISSCHEDULEDRESPONSE']._serialized_end=424
+  _globals['_ADDSCHEDULEREQUEST']._serialized_start=426
+  _globals['_ADDSCHEDULEREQUEST']._serialized_end=494
+  _globals['_IMPORTSCHEDULEREQUEST']._serialized_start=496
+  _globals['_IMPORTSCHEDULEREQUEST']._serialized_end=584
+  _globals['_IMPORTSCHEDULESUMMARY']._serialized_start=587
+  _globals['_IMPORTSCHEDULESUMMARY']._serialized_end=715
+  _globals['_SCHEDULEDATA']._serialized_start=717
+  _globals['_SCHEDULEDATA']._serialized_end=794
+  _globals['_MOVIEDATA']._serialized_start=796
+  _globals['_MOVIEDATA']._serialized_end=868
+  _globals['_DATEDATA']._serialized_start=870
+  _globals['_DATEDATA']._serialized_end=895
+  _globals['_EMPTY']._serialized_start=897
+  _globals['_EMPTY']._serialized_end=904
+  _globals['_SCHEDULE']._serialized_start=907
+  _globals['_SCHEDULE']._serialized_end=1463
 # @@protoc_insertion_point(module_scope)
@@ -49,6 +49,16 @@ class ScheduleStub(object):
                 request_serializer=schedule__pb2.GetScheduleByMovieRequest.SerializeToString,
                 response_deserializer=schedule__pb2.DateData.FromString,
                 _registered_method=True)
+        self.GetScheduleRange = channel.unary_stream(
+                '/Schedule/GetScheduleRange',
+                request_serializer=schedule__pb2.GetScheduleRangeRequest.SerializeToString,
+                response_deserializer=schedule__pb2.ScheduleData.FromString,
+                _registered_method=True)
+        self.IsScheduled = channel.unary_unary(
+                '/Schedule/IsScheduled',
+                request_serializer=schedule__pb2.IsScheduledRequest.SerializeToString,
+                response_deserializer=schedule__pb2.IsScheduledResponse.FromString,
+                _registered_method=True)
         self.AddSchedule = channel.unary_unary(
                 '/Schedule/AddSchedule',
                 request_serializer=schedule__pb2.AddScheduleRequest.SerializeToString,
@@ -59,6 +69,11 @@ class ScheduleStub(object):
                 request_serializer=schedule__pb2.AddScheduleRequest.SerializeToString,
                 response_deserializer=schedule__pb2.ScheduleData.FromString,
                 _registered_method=True)
+        self.ImportSchedule = channel.stream_unary(
+                '/Schedule/ImportSchedule',
+                request_serializer=schedule__pb2.ImportScheduleRequest.SerializeToString,
+                response_deserializer=schedule__pb2.ImportScheduleSummary.FromString,
+                _registered_method=True)
         self.DeleteDate = channel.unary_unary(
                 '/Schedule/DeleteDate',
                 request_serializer=schedule__pb2.AddScheduleRequest.SerializeToString,
@@ -93,6 +108,18 @@ class ScheduleServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetScheduleRange(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def IsScheduled(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def AddSchedule(self, request, context):
         """Ajout
         """
@@ -106,6 +133,12 @@ class ScheduleServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ImportSchedule(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
     def DeleteDate(self, request, context):
         """Suppression
         """
@@ -137,6 +170,16 @@ def add_ScheduleServicer_to_server(servicer, server):
                     request_deserializer=schedule__pb2.GetScheduleByMovieRequest.FromString,
                     response_serializer=schedule__pb2.DateData.SerializeToString,
             ),
+            'GetScheduleRange': grpc.unary_stream_rpc_method_handler(
+                    servicer.GetScheduleRange,
+                    request_deserializer=schedule__pb2.GetScheduleRangeRequest.FromString,
+                    response_serializer=schedule__pb2.ScheduleData.SerializeToString,
+            ),
+            'IsScheduled': grpc.unary_unary_rpc_method_handler(
+                    servicer.IsScheduled,
+                    request_deserializer=schedule__pb2.IsScheduledRequest.FromString,
+                    response_serializer=schedule__pb2.IsScheduledResponse.SerializeToString,
+            ),
             'AddSchedule': grpc.unary_unary_rpc_method_handler(
                     servicer.AddSchedule,
                     request_deserializer=schedule__pb2.AddScheduleRequest.FromString,
@@ -147,6 +190,11 @@ def add_ScheduleServicer_to_server(servicer, server):
                     request_deserializer=schedule__pb2.AddScheduleRequest.FromString,
                     response_serializer=schedule__pb2.ScheduleData.SerializeToString,
             ),
+            'ImportSchedule': grpc.stream_unary_rpc_method_handler(
+                    servicer.ImportSchedule,
+                    request_deserializer=schedule__pb2.ImportScheduleRequest.FromString,
+                    response_serializer=schedule__pb2.ImportScheduleSummary.SerializeToString,
+            ),
             'DeleteDate': grpc.unary_unary_rpc_method_handler(
                     servicer.DeleteDate,
                     request_deserializer=schedule__pb2.AddScheduleRequest.FromString,
@@ -249,6 +297,60 @@ class Schedule(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def GetScheduleRange(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/Schedule/GetScheduleRange',
+            schedule__pb2.GetScheduleRangeRequest.SerializeToString,
+            schedule__pb2.ScheduleData.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def IsScheduled(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/Schedule/IsScheduled',
+            schedule__pb2.IsScheduledRequest.SerializeToString,
+            schedule__pb2.IsScheduledResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def AddSchedule(request,
             target,
@@ -303,6 +405,33 @@ class Schedule(object):
             metadata,
             _registered_method=True)
 
+    @staticmethod
+    def ImportSchedule(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/Schedule/ImportSchedule',
+            schedule__pb2.ImportScheduleRequest.SerializeToString,
+            schedule__pb2.ImportScheduleSummary.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
     @staticmethod
     def DeleteDate(request,
             target,
@@ -0,0 +1,7 @@
+"""
+Modules partagés par les quatre microservices (stockage, cache admin,
+jetons, client HTTP).
+
+Les Dockerfiles copient ce paquet dans /app/common ; en exécution locale,
+chaque service ajoute le dossier parent au chemin d'import.
+"""
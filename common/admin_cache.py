@@ -0,0 +1,213 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class UserNotFound(LookupError):
+    """Le service User ne connaît pas cet utilisateur (réponse 404)."""
+
+
+class _Flight:
+    """Chargement en cours d'une clé, partagé par toutes les requêtes qui l'attendent."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class AdminCache:
+    """
+    Cache borné (LRU + TTL) du statut admin des utilisateurs.
+
+    `fetch(user_id)` interroge le service User et retourne un booléen, ou lève
+    UserNotFound si l'utilisateur n'existe pas. Le cache :
+    - garde au plus `max_size` utilisateurs, le moins récemment utilisé est évincé ;
+    - ne fait qu'un seul appel quand plusieurs requêtes ratent la même clé en
+      même temps (les autres attendent son résultat) ;
+    - mémorise aussi les utilisateurs inconnus, pendant `negative_ttl` secondes ;
+    - recharge en arrière-plan une entrée qui a dépassé `refresh_ahead` de son
+      TTL, pour qu'elle n'expire pas sous le trafic.
+    Les autres erreurs de `fetch` (service injoignable...) ne sont pas mises en cache.
+
+    Avec `fetch_many(user_ids) -> { user_id: bool }` (les utilisateurs
+    inconnus sont absents du résultat), les chargements de différents
+    utilisateurs lancés pendant `batch_window` secondes sont regroupés en un
+    seul appel, d'au plus `batch_size` utilisateurs : après un redémarrage,
+    des milliers de vérifications ne coûtent que quelques requêtes.
+    """
+
+    def __init__(self, fetch, ttl=60, max_size=10000, negative_ttl=10, refresh_ahead=0.8,
+                 fetch_many=None, batch_window=0.005, batch_size=100):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.max_size = max_size
+        self.negative_ttl = negative_ttl
+        self.refresh_ahead = refresh_ahead
+        self.fetch_many = fetch_many
+        self.batch_window = batch_window
+        self.batch_size = batch_size
+        self._entries = OrderedDict()  # user_id -> (is_admin ou UserNotFound, rafraîchir après, expire à)
+        self._flights = {}             # user_id -> _Flight en cours
+        self._batch = {}               # user_id -> _Flight en attente du prochain appel groupé
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.evictions = 0
+        self.batches = 0
+
+    def get(self, user_id, cached_only=False):
+        """
+        Args:
+            cached_only (bool): ne jamais appeler le service User, retourner
+                None si l'utilisateur n'est pas en cache (pour un appelant
+                qui ne doit pas bloquer, comme une boucle asyncio).
+
+        Returns:
+            bool: True si l'utilisateur est admin.
+
+        Raises:
+            UserNotFound: si l'utilisateur n'existe pas.
+        """
+        user_id = str(user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and now < entry[2]:
+                value, refresh_at, _ = entry
+                self._entries.move_to_end(user_id)
+                if now >= refresh_at and user_id not in self._flights:
+                    self._flights[user_id] = flight = _Flight()
+                    self.refreshes += 1
+                    if self.fetch_many is not None:
+                        self._enqueue(user_id, flight)
+                    else:
+                        threading.Thread(target=self._load, args=(user_id, flight), daemon=True).start()
+                if isinstance(value, UserNotFound):
+                    self.negative_hits += 1
+                    raise value
+                self.hits += 1
+                return value
+            if cached_only:
+                return None
+
+            flight = self._flights.get(user_id)
+            leader = flight is None
+            if leader:
+                self._flights[user_id] = flight = _Flight()
+                self.misses += 1
+                if self.fetch_many is not None:
+                    self._enqueue(user_id, flight)
+                    leader = False
+            else:
+                self.coalesced += 1
+
+        if leader:
+            self._load(user_id, flight)
+        else:
+            flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.value
+
+    def put(self, user_id, value):
+        """
+        Enregistre un statut obtenu hors du cache, par exemple par un appel
+        asynchrone de l'appelant.
+
+        Args:
+            value: booléen is_admin, ou UserNotFound si l'utilisateur n'existe pas.
+        """
+        if isinstance(value, UserNotFound):
+            cached, ttl = value, self.negative_ttl
+        else:
+            cached, ttl = bool(value), self.ttl
+        with self._lock:
+            self._store(str(user_id), cached, ttl)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "refreshes": self.refreshes,
+                "evictions": self.evictions,
+                "batches": self.batches,
+            }
+
+    def _load(self, user_id, flight):
+        try:
+            flight.value = bool(self.fetch(user_id))
+        except Exception as e:
+            flight.error = e
+        with self._lock:
+            self._finish(user_id, flight)
+        flight.done.set()
+
+    def _enqueue(self, user_id, flight):
+        """Ajoute un chargement au prochain appel groupé. Appelé avec le verrou tenu."""
+        self._batch[user_id] = flight
+        if len(self._batch) == 1:
+            # premier de la fenêtre : l'appel partira à la fin de la fenêtre
+            timer = threading.Timer(self.batch_window, self._load_batch)
+            timer.daemon = True
+            timer.start()
+        elif len(self._batch) >= self.batch_size:
+            batch, self._batch = self._batch, {}
+            threading.Thread(target=self._load_batch, args=(batch,), daemon=True).start()
+
+    def _load_batch(self, batch=None):
+        if batch is None:
+            with self._lock:
+                batch, self._batch = self._batch, {}
+            if not batch:
+                # déjà parti parce que batch_size était atteint
+                return
+        try:
+            found = self.fetch_many(list(batch))
+            for user_id, flight in batch.items():
+                if user_id in found:
+                    flight.value = bool(found[user_id])
+                else:
+                    flight.error = UserNotFound(user_id)
+        except Exception as e:
+            for flight in batch.values():
+                flight.error = e
+        with self._lock:
+            self.batches += 1
+            for user_id, flight in batch.items():
+                self._finish(user_id, flight)
+        for flight in batch.values():
+            flight.done.set()
+
+    def _finish(self, user_id, flight):
+        """Enregistre le résultat d'un chargement. Appelé avec le verrou tenu."""
+        del self._flights[user_id]
+        if flight.error is None:
+            cached, ttl = flight.value, self.ttl
+        elif isinstance(flight.error, UserNotFound):
+            cached, ttl = flight.error, self.negative_ttl
+        else:
+            # erreur passagère : on garde l'éventuelle entrée existante jusqu'à son expiration
+            return
+        self._store(user_id, cached, ttl)
+
+    def _store(self, user_id, cached, ttl):
+        """Ajoute ou remplace une entrée. Appelé avec le verrou tenu."""
+        now = time.monotonic()
+        self._entries[user_id] = (cached, now + ttl * self.refresh_ahead, now + ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
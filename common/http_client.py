@@ -0,0 +1,94 @@
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# réponses d'un service surchargé ou en redémarrage : une nouvelle tentative a des chances d'aboutir
+RETRY_STATUSES = {502, 503, 504}
+
+
+class HttpClient:
+    """
+    Client HTTP des appels entre microservices.
+
+    Chaque hôte appelé a sa propre session, donc son propre pool de
+    connexions keep-alive (au plus `pool_size` connexions) : une connexion
+    TCP est réutilisée d'un appel à l'autre au lieu d'être ouverte à chaque
+    requête. Chaque appel a un délai de connexion et un délai de lecture.
+
+    Les lectures (GET, ou POST marqué `idempotent=True` comme une requête
+    GraphQL `query`) sont retentées au plus `retries` fois sur erreur réseau
+    ou réponse 502/503/504, après une attente aléatoire croissante
+    (backoff exponentiel avec jitter). Les écritures ne sont jamais retentées.
+    """
+
+    def __init__(self, connect_timeout=1.0, read_timeout=5.0, retries=2, backoff=0.05, pool_size=20):
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self._sessions = {}   # hôte -> requests.Session
+        self._stats = {}      # hôte -> compteurs
+        self._lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, idempotent=True, **kwargs)
+
+    def post(self, url, idempotent=False, **kwargs):
+        return self.request("POST", url, idempotent=idempotent, **kwargs)
+
+    def request(self, method, url, idempotent=False, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        host = urlsplit(url).netloc
+        session, stats = self._session(host)
+        attempts = 1 + (self.retries if idempotent else 0)
+
+        for attempt in range(attempts):
+            with self._lock:
+                stats["requests"] += 1
+                stats["in_flight"] += 1
+                stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+                # toutes les connexions du pool sont prises : la requête attend ou ouvre une connexion jetable
+                if stats["in_flight"] > self.pool_size:
+                    stats["saturated"] += 1
+            try:
+                response = session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                self._count(stats, "errors")
+                if attempt + 1 == attempts:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt + 1 == attempts:
+                    return response
+                self._count(stats, "errors")
+            finally:
+                self._count(stats, "in_flight", -1)
+
+            self._count(stats, "retries")
+            time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+    def stats(self):
+        with self._lock:
+            return {host: dict(stats, pool_size=self.pool_size) for host, stats in self._stats.items()}
+
+    def _session(self, host):
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[host] = session
+                self._stats[host] = {
+                    "requests": 0, "in_flight": 0, "max_in_flight": 0,
+                    "saturated": 0, "retries": 0, "errors": 0,
+                }
+            return session, self._stats[host]
+
+    def _count(self, stats, name, delta=1):
+        with self._lock:
+            stats[name] += delta
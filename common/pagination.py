@@ -0,0 +1,55 @@
+import base64
+import binascii
+
+from graphql import GraphQLError
+
+# taille de page par défaut et maximale des connexions paginées
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(str(key).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        return base64.b64decode(cursor.encode(), altchars=b"-_", validate=True).decode()
+    except (binascii.Error, ValueError):
+        raise GraphQLError("Invalid cursor: " + cursor)
+
+
+def keyset_page(store, first=DEFAULT_PAGE_SIZE, after=None):
+    """
+    Relay-style page over a store, in ascending key order.
+
+    The cursor encodes the last key seen rather than a position, so a page
+    resumes right after that key even if items were inserted or deleted
+    in between (or the key itself was deleted).
+
+    Returns:
+        tuple: (records of the page, has_next_page)
+    """
+    if first < 0:
+        raise GraphQLError("first must be positive")
+    first = min(first, MAX_PAGE_SIZE)
+
+    after_key = decode_cursor(after) if after is not None else None
+    # un enregistrement de plus que demandé indique s'il existe une page suivante
+    records = store.scan(after_key, first + 1)
+    return records[:first], len(records) > first
+
+
+def connection(records, has_next_page, key, total_count):
+    """
+    Build a Relay connection dict (edges / pageInfo) for the given records.
+    """
+    edges = [{"cursor": encode_cursor(record[key]), "node": record} for record in records]
+    return {
+        "edges": edges,
+        "pageInfo": {
+            "hasNextPage": has_next_page,
+            "endCursor": edges[-1]["cursor"] if edges else None,
+        },
+        "totalCount": total_count,
+    }
@@ -0,0 +1,108 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+from graphql import GraphQLError, parse, validate
+
+
+class PersistedQueryNotFound(GraphQLError):
+    """Le client n'a envoyé que le hash d'une requête inconnue du serveur."""
+
+    def __init__(self):
+        super().__init__(
+            "PersistedQueryNotFound",
+            extensions={"code": "PERSISTED_QUERY_NOT_FOUND"},
+        )
+
+
+def query_hash(query):
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+def skip_validation(*args, **kwargs):
+    """`query_validator` pour graphql_sync : les documents du cache sont déjà validés."""
+    return []
+
+
+class QueryCache:
+    """
+    Cache LRU borné des documents GraphQL analysés et validés, indexé par le
+    hash SHA-256 du texte de la requête.
+
+    Gère aussi les requêtes persistées (protocole APQ) : un client peut
+    n'envoyer que `extensions.persistedQuery.sha256Hash` ; si le hash est
+    inconnu, il renvoie une seule fois la requête complète avec ce hash.
+    """
+
+    def __init__(self, schema, max_size=1000):
+        self.schema = schema
+        self.max_size = max_size
+        self._entries = OrderedDict()  # hash -> (texte, document, erreurs de validation)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.persisted_hits = 0
+        self.persisted_misses = 0
+
+    def prepare(self, data):
+        """
+        Retourne (data, document, erreurs) pour une requête entrante.
+        `data["query"]` est complété pour une requête persistée envoyée par hash.
+        Lève une GraphQLError si la requête est absente, invalide ou inconnue.
+        """
+        if not isinstance(data, dict):
+            raise GraphQLError("Operation data should be a JSON object")
+
+        query = data.get("query")
+        persisted = (data.get("extensions") or {}).get("persistedQuery") or {}
+        sent_hash = persisted.get("sha256Hash")
+
+        if query is None and sent_hash:
+            with self._lock:
+                entry = self._entries.get(sent_hash)
+                if entry is None:
+                    self.persisted_misses += 1
+                    raise PersistedQueryNotFound()
+                self._entries.move_to_end(sent_hash)
+                self.persisted_hits += 1
+                self.hits += 1
+            return dict(data, query=entry[0]), entry[1], entry[2]
+
+        if not query or not isinstance(query, str):
+            raise GraphQLError("The query must be a string.")
+
+        key = query_hash(query)
+        if sent_hash and sent_hash != key:
+            raise GraphQLError("provided sha does not match query")
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return data, entry[1], entry[2]
+            self.misses += 1
+
+        # analyse et validation hors verrou : les autres requêtes ne sont pas bloquées
+        document = parse(query)
+        errors = validate(self.schema, document)
+        with self._lock:
+            self._entries[key] = (query, document, errors)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return data, document, errors
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "persisted_hits": self.persisted_hits,
+                "persisted_misses": self.persisted_misses,
+            }
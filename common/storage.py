@@ -0,0 +1,489 @@
+import bisect
+import json
+import os
+import sqlite3
+import threading
+
+
+def open_store(backend, path, collection, key, indexes=None, compact_every=1000):
+    """
+    Ouvre le stockage d'une collection avec le backend choisi dans config.py.
+
+    Args:
+        backend (str): "json" (instantané + journal, tout en mémoire) ou
+            "sqlite" (base embarquée, rien n'est chargé au démarrage).
+        path (str): chemin de l'instantané JSON (`databases/<collection>.json`).
+        collection (str): nom de la liste dans le fichier JSON.
+        key (str): champ identifiant un enregistrement.
+        indexes (dict): index secondaires { nom: fonction(enregistrement) -> valeurs }.
+    """
+    if backend == "json":
+        return JsonStore(path, collection, key, indexes, compact_every)
+    if backend == "sqlite":
+        return SqliteStore(path, collection, key, indexes)
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+class Store:
+    """
+    Interface commune des backends de stockage.
+
+    Un enregistrement est un dict JSON identifié par `record[key]`. Les
+    index secondaires associent à chaque enregistrement une ou plusieurs
+    valeurs (ex : le titre d'un film) pour le retrouver avec `find`.
+    Un enregistrement lu puis modifié doit toujours être réécrit avec `put`.
+    """
+
+    def __init__(self, collection, key, indexes=None):
+        self.collection = collection
+        self.key = key
+        self.indexes = indexes or {}
+
+    def get(self, key):
+        """Retourne l'enregistrement de clé `key`, ou None."""
+        raise NotImplementedError
+
+    def get_many(self, keys):
+        """Retourne les enregistrements dans l'ordre de `keys` (None si absent)."""
+        return [self.get(key) for key in keys]
+
+    def find(self, index, value):
+        """Retourne les enregistrements dont l'index `index` contient `value`."""
+        raise NotImplementedError
+
+    def contains(self, index, value, key):
+        """Indique si l'index `index` de l'enregistrement `key` contient `value`, sans le lire."""
+        record = self.get(key)
+        return record is not None and str(value) in self._index_values(record)[index]
+
+    def scan(self, after=None, limit=None):
+        """Retourne les enregistrements de clé > `after`, triés par clé."""
+        raise NotImplementedError
+
+    def range(self, start=None, end=None, limit=None):
+        """Retourne les enregistrements de clé comprise entre `start` et `end` (inclus), triés par clé."""
+        raise NotImplementedError
+
+    def records(self):
+        """Retourne tous les enregistrements, dans l'ordre d'insertion."""
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def put(self, record):
+        """Ajoute ou remplace un enregistrement (durable au retour)."""
+        raise NotImplementedError
+
+    def put_many(self, records):
+        """Ajoute ou remplace plusieurs enregistrements en une seule écriture atomique (tous ou aucun)."""
+        raise NotImplementedError
+
+    def delete(self, key):
+        """Supprime un enregistrement (durable au retour)."""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def _index_values(self, record):
+        return {
+            name: tuple(dict.fromkeys(str(value) for value in index(record)))
+            for name, index in self.indexes.items()
+        }
+
+
+class JsonStore(Store):
+    """
+    Backend JSON : toute la collection est en mémoire, avec ses index.
+
+    L'état est un instantané (le fichier `databases/<collection>.json`
+    habituel) suivi d'un journal en ajout seul (`<collection>.log`) : chaque
+    mutation ajoute une ligne au journal au lieu de réécrire tout le fichier,
+    donc une écriture coûte O(taille de l'enregistrement).
+
+    Les écritures sont regroupées (group commit) : un seul fsync rend durables
+    toutes les lignes ajoutées par les requêtes concurrentes. Quand le
+    journal dépasse `compact_every` lignes, un nouvel instantané est écrit en
+    arrière-plan (fichier temporaire puis renommage atomique) et le journal
+    repart de zéro. Au démarrage, l'instantané est rechargé puis le journal
+    rejoué.
+    """
+
+    def __init__(self, path, collection, key, indexes=None, compact_every=1000):
+        super().__init__(collection, key, indexes)
+        self.path = path
+        self.log_path = os.path.splitext(path)[0] + ".log"
+        self.compacting_path = self.log_path + ".compacting"
+        self.compact_every = compact_every
+
+        self._records = {}
+        self._sorted_keys = []   # clés triées, pour scan()
+        self._index = {name: {} for name in self.indexes}   # nom -> valeur -> { clé: None }
+        self._indexed = {}       # clé -> valeurs indexées, pour désindexer après une modification en place
+        self._cond = threading.Condition()
+        self._written = 0        # nombre de lignes écrites dans le journal courant
+        self._synced = 0         # nombre de lignes rendues durables par fsync
+        self._syncing = False
+        self._compacting = False
+        self._load()
+        self._log = open(self.log_path, "a", encoding="utf-8")
+
+    # Les lectures ne prennent pas le verrou : une écriture peut supprimer une
+    # clé entre la copie de la liste des clés et la lecture de l'enregistrement.
+
+    def get(self, key):
+        return self._records.get(str(key))
+
+    def find(self, index, value):
+        return self._lookup(list(self._index[index].get(str(value), ())))
+
+    def contains(self, index, value, key):
+        return str(key) in self._index[index].get(str(value), ())
+
+    def scan(self, after=None, limit=None):
+        start = 0 if after is None else bisect.bisect_right(self._sorted_keys, str(after))
+        end = None if limit is None else start + limit
+        return self._lookup(self._sorted_keys[start:end])
+
+    def range(self, start=None, end=None, limit=None):
+        lo = 0 if start is None else bisect.bisect_left(self._sorted_keys, str(start))
+        hi = len(self._sorted_keys) if end is None else bisect.bisect_right(self._sorted_keys, str(end))
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return self._lookup(self._sorted_keys[lo:hi])
+
+    def records(self):
+        return list(self._records.values())
+
+    def __len__(self):
+        return len(self._records)
+
+    def _lookup(self, keys):
+        records = self._records
+        return [record for record in map(records.get, keys) if record is not None]
+
+    def put(self, record):
+        self._append({"op": "put", "key": str(record[self.key]), "record": record})
+
+    def put_many(self, records):
+        # une seule ligne de journal : après un arrêt brutal, elle est rejouée entière ou pas du tout
+        self._append({"op": "batch", "entries": [
+            {"op": "put", "key": str(record[self.key]), "record": record} for record in records
+        ]})
+
+    def delete(self, key):
+        self._append({"op": "delete", "key": str(key)})
+
+    def close(self):
+        with self._cond:
+            self._log.close()
+
+    def compact(self):
+        """Écrit un nouvel instantané et vide le journal."""
+        with self._cond:
+            if self._compacting:
+                return
+            self._compacting = True
+            while self._synced < self._written:
+                self._wait_synced(self._written)
+            # le journal courant est mis de côté : les nouvelles écritures partent dans un journal vide
+            self._log.close()
+            self._set_aside_log()
+            self._log = open(self.log_path, "a", encoding="utf-8")
+            self._written = self._synced = 0
+            records = list(self._records.values())
+
+        try:
+            self._write_snapshot(records)
+            os.remove(self.compacting_path)
+        finally:
+            with self._cond:
+                self._compacting = False
+
+    def _set_aside_log(self):
+        if not os.path.exists(self.compacting_path):
+            os.replace(self.log_path, self.compacting_path)
+            return
+        # une compaction précédente a échoué : son journal n'est pas encore dans l'instantané
+        with open(self.log_path, "r", encoding="utf-8") as src, open(self.compacting_path, "a", encoding="utf-8") as dst:
+            dst.write(src.read())
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.remove(self.log_path)
+
+    def _apply(self, entry):
+        if entry["op"] == "batch":
+            for sub_entry in entry["entries"]:
+                self._apply(sub_entry)
+            return
+        key = entry["key"]
+        self._unindex(key)
+        if entry["op"] == "put":
+            record = entry["record"]
+            if key not in self._records:
+                bisect.insort(self._sorted_keys, key)
+            self._records[key] = record
+            if self.indexes:
+                self._indexed[key] = self._index_values(record)
+                for name, values in self._indexed[key].items():
+                    for value in values:
+                        self._index[name].setdefault(value, {})[key] = None
+        elif entry["op"] == "delete" and key in self._records:
+            del self._records[key]
+            del self._sorted_keys[bisect.bisect_left(self._sorted_keys, key)]
+
+    def _unindex(self, key):
+        for name, values in self._indexed.pop(key, {}).items():
+            for value in values:
+                keys = self._index[name].get(value)
+                if keys is not None:
+                    keys.pop(key, None)
+                    if not keys:
+                        del self._index[name][value]
+
+    def _append(self, entry):
+        line = json.dumps(entry) + "\n"
+        with self._cond:
+            self._apply(entry)
+            self._log.write(line)
+            self._written += 1
+            self._wait_synced(self._written)
+            compact = self._written >= self.compact_every and not self._compacting
+
+        if compact:
+            threading.Thread(target=self.compact, daemon=True).start()
+
+    def _wait_synced(self, seq):
+        """
+        Attend que la ligne `seq` soit durable. Le premier thread en attente
+        fait le fsync pour toutes les lignes écrites jusque-là ; les autres
+        attendent son résultat. Appelé avec le verrou tenu.
+        """
+        log = self._log
+        while self._synced < seq and self._log is log:
+            if self._syncing:
+                self._cond.wait()
+                continue
+            self._syncing = True
+            target = self._written
+            log.flush()
+            self._cond.release()
+            try:
+                os.fsync(log.fileno())
+            finally:
+                self._cond.acquire()
+                self._syncing = False
+                self._cond.notify_all()
+            self._synced = max(self._synced, target)
+
+    def _load(self):
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for record in json.load(f)[self.collection]:
+                    self._apply({"op": "put", "key": str(record[self.key]), "record": record})
+
+        # journal d'une compaction interrompue, puis journal courant
+        for log_path in (self.compacting_path, self.log_path):
+            if os.path.exists(log_path):
+                self._replay(log_path)
+
+    def _replay(self, log_path):
+        valid_size = 0
+        with open(log_path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # ligne tronquée par un arrêt brutal : elle n'a jamais été confirmée
+                    break
+                self._apply(entry)
+                valid_size += len(line)
+
+        # on coupe la fin tronquée pour que les prochains ajouts restent lisibles
+        if valid_size < os.path.getsize(log_path):
+            with open(log_path, "r+b") as f:
+                f.truncate(valid_size)
+
+    def _write_snapshot(self, records):
+        # les enregistrements peuvent être modifiés pendant la sérialisation ;
+        # ce n'est pas grave car chaque modification est aussi dans le nouveau journal
+        for attempt in range(3):
+            try:
+                data = json.dumps({self.collection: records})
+                break
+            except RuntimeError:
+                if attempt == 2:
+                    raise
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        directory = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+
+class SqliteStore(Store):
+    """
+    Backend SQLite : la collection reste sur disque (`databases/<collection>.db`).
+
+    Les enregistrements sont dans une table indexée par clé, les index
+    secondaires dans une table (nom, valeur, clé). La base est en mode WAL
+    (les lectures ne bloquent pas les écritures), synchronisée à chaque
+    commit (`synchronous = FULL`), et chaque thread garde sa
+    connexion, dont le cache de requêtes préparées est réutilisé d'un appel
+    à l'autre. Au premier démarrage, la base est remplie depuis l'instantané
+    JSON et son journal.
+    """
+
+    def __init__(self, path, collection, key, indexes=None):
+        super().__init__(collection, key, indexes)
+        self.json_path = path
+        self.db_path = os.path.splitext(path)[0] + ".db"
+        self._local = threading.local()
+        self._init_schema()
+
+    def get(self, key):
+        row = self._conn().execute("SELECT data FROM records WHERE key = ?", (str(key),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, keys):
+        keys = [str(key) for key in keys]
+        found = {}
+        # par paquets, pour rester sous la limite de paramètres de SQLite
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            rows = self._conn().execute(
+                f"SELECT key, data FROM records WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            )
+            found.update((k, json.loads(data)) for k, data in rows)
+        return [found.get(key) for key in keys]
+
+    def find(self, index, value):
+        rows = self._conn().execute(
+            "SELECT r.data FROM record_index i JOIN records r ON r.key = i.key "
+            "WHERE i.name = ? AND i.value = ? ORDER BY r.rowid",
+            (index, str(value)),
+        )
+        return [json.loads(data) for (data,) in rows]
+
+    def contains(self, index, value, key):
+        row = self._conn().execute(
+            "SELECT 1 FROM record_index WHERE name = ? AND value = ? AND key = ?",
+            (index, str(value), str(key)),
+        ).fetchone()
+        return row is not None
+
+    def scan(self, after=None, limit=None):
+        rows = self._conn().execute(
+            "SELECT data FROM records WHERE key > ? ORDER BY key LIMIT ?",
+            ("" if after is None else str(after), -1 if limit is None else limit),
+        )
+        return [json.loads(data) for (data,) in rows]
+
+    def range(self, start=None, end=None, limit=None):
+        rows = self._conn().execute(
+            "SELECT data FROM records WHERE key >= ? AND (? IS NULL OR key <= ?) ORDER BY key LIMIT ?",
+            (
+                "" if start is None else str(start),
+                None if end is None else str(end),
+                None if end is None else str(end),
+                -1 if limit is None else limit,
+            ),
+        )
+        return [json.loads(data) for (data,) in rows]
+
+    def records(self):
+        rows = self._conn().execute("SELECT data FROM records ORDER BY rowid")
+        return [json.loads(data) for (data,) in rows]
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def put(self, record):
+        conn = self._conn()
+        with conn:
+            self._put(conn, record)
+
+    def put_many(self, records):
+        conn = self._conn()
+        with conn:
+            for record in records:
+                self._put(conn, record)
+
+    def delete(self, key):
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM records WHERE key = ?", (str(key),))
+            conn.execute("DELETE FROM record_index WHERE key = ?", (str(key),))
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _put(self, conn, record):
+        key = str(record[self.key])
+        conn.execute(
+            "INSERT INTO records (key, data) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET data = excluded.data",
+            (key, json.dumps(record)),
+        )
+        if self.indexes:
+            conn.execute("DELETE FROM record_index WHERE key = ?", (key,))
+            conn.executemany(
+                "INSERT OR IGNORE INTO record_index (name, value, key) VALUES (?, ?, ?)",
+                [(name, value, key) for name, values in self._index_values(record).items() for value in values],
+            )
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, cached_statements=256)
+            conn.execute("PRAGMA journal_mode = WAL")
+            # FULL : chaque commit est synchronisé sur disque avant de rendre la main
+            # (avec NORMAL, le WAL peut perdre les derniers commits en cas de coupure de courant)
+            conn.execute("PRAGMA synchronous = FULL")
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._conn()
+        with conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS records (key TEXT PRIMARY KEY, data TEXT NOT NULL)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS record_index ("
+                "name TEXT NOT NULL, value TEXT NOT NULL, key TEXT NOT NULL, "
+                "PRIMARY KEY (name, value, key)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS record_index_key ON record_index (key)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+        empty = conn.execute("SELECT 1 FROM records LIMIT 1").fetchone() is None
+        if empty and os.path.exists(self.json_path):
+            json_store = JsonStore(self.json_path, self.collection, self.key)
+            with conn:
+                for record in json_store.records():
+                    self._put(conn, record)
+            json_store.close()
+
+        # les index déclarés ont changé depuis la dernière ouverture : on les reconstruit
+        declared = json.dumps(sorted(self.indexes))
+        stored = conn.execute("SELECT value FROM meta WHERE name = 'indexes'").fetchone()
+        if stored is None or stored[0] != declared:
+            with conn:
+                conn.execute("DELETE FROM record_index")
+                for (data,) in conn.execute("SELECT data FROM records").fetchall():
+                    self._put(conn, json.loads(data))
+                conn.execute(
+                    "INSERT INTO meta (name, value) VALUES ('indexes', ?) "
+                    "ON CONFLICT (name) DO UPDATE SET value = excluded.value",
+                    (declared,),
+                )
@@ -0,0 +1,95 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+# version du format : v1.<kid>.<charge utile>.<signature>
+TOKEN_VERSION = "v1"
+
+
+class InvalidToken(ValueError):
+    """Jeton mal formé, signé avec une clé inconnue, falsifié ou expiré."""
+
+
+def parse_keys(spec):
+    """
+    Lit la liste des clés de signature, au format "kid1:secret1,kid2:secret2".
+
+    Returns:
+        dict: { kid: secret (bytes) }, dans l'ordre de la liste.
+    """
+    keys = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        kid, sep, secret = item.partition(":")
+        if not sep or not kid or not secret:
+            raise ValueError(f"Invalid token key (expected kid:secret): {kid}")
+        keys[kid] = secret.encode()
+    return keys
+
+
+def is_token(value):
+    return isinstance(value, str) and value.startswith(TOKEN_VERSION + ".")
+
+
+def issue_token(user_id, is_admin, keys, kid, ttl, now=None):
+    """
+    Signe un jeton portant l'ID de l'utilisateur et son statut admin,
+    valable `ttl` secondes, avec la clé `kid`.
+    """
+    now = int(time.time() if now is None else now)
+    payload = _b64encode(json.dumps(
+        {"sub": str(user_id), "adm": bool(is_admin), "iat": now, "exp": now + ttl},
+        separators=(",", ":"),
+    ).encode())
+    signing_input = f"{TOKEN_VERSION}.{kid}.{payload}"
+    return f"{signing_input}.{_sign(keys[kid], signing_input)}"
+
+
+def verify_token(token, keys, now=None):
+    """
+    Vérifie localement un jeton, sans appel au service User. Toutes les clés
+    de `keys` sont acceptées : pendant une rotation, les jetons signés avec
+    l'ancienne clé restent valides jusqu'à leur expiration.
+
+    Returns:
+        tuple: (user_id, is_admin)
+
+    Raises:
+        InvalidToken: si le jeton est invalide ou expiré.
+    """
+    try:
+        version, kid, payload, signature = token.split(".")
+    except ValueError:
+        raise InvalidToken("Malformed token")
+    if version != TOKEN_VERSION:
+        raise InvalidToken("Unsupported token version")
+    secret = keys.get(kid)
+    if secret is None:
+        raise InvalidToken("Unknown token key")
+    if not hmac.compare_digest(signature, _sign(secret, f"{version}.{kid}.{payload}")):
+        raise InvalidToken("Bad token signature")
+
+    try:
+        claims = json.loads(_b64decode(payload))
+        user_id, is_admin, expires_at = claims["sub"], claims["adm"], claims["exp"]
+    except (ValueError, KeyError, TypeError):
+        raise InvalidToken("Malformed token")
+    if (time.time() if now is None else now) >= expires_at:
+        raise InvalidToken("Token expired")
+    return user_id, bool(is_admin)
+
+
+def _sign(secret, signing_input):
+    return _b64encode(hmac.new(secret, signing_input.encode(), hashlib.sha256).digest())
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
@@ -0,0 +1,153 @@
+import threading
+import uuid
+from collections import deque
+
+from search import SearchIndex
+
+# index secondaires déclarés au stockage
+MOVIE_INDEXES = {
+    "title": lambda movie: [movie["title"]],
+    "director": lambda movie: [movie["director"]],
+}
+
+
+class MovieCatalog:
+    """
+    Movie catalog on top of a storage backend.
+
+    The store holds the primary id -> movie map and the secondary indexes
+    title -> ids and director -> ids; the full-text search index is kept in
+    memory. Every mutation goes through this class so the indexes always
+    stay consistent with the stored movies.
+
+    Each mutation also bumps `version` and is recorded in a bounded change
+    feed (the last `history` changes), so that other services caching movies
+    can poll `changes_since` and drop only what changed. `epoch` identifies
+    this process: versions restart from 0 when it changes.
+    """
+
+    def __init__(self, store, history=10000):
+        self.store = store
+        self._search = SearchIndex()
+        self._lock = threading.RLock()
+        self.epoch = uuid.uuid4().hex
+        self.version = 0
+        self._changes = deque(maxlen=history)  # (version, movie_id)
+        for movie in store.records():
+            self._search.add(movie)
+
+    def __len__(self):
+        return len(self.store)
+
+    def __contains__(self, id):
+        return self.store.get(id) is not None
+
+    def all(self):
+        """
+        Returns:
+            list: every movie, in insertion order.
+        """
+        return self.store.records()
+
+    def scan(self, after=None, limit=None):
+        """
+        Returns:
+            list: movies with an ID greater than `after`, in ascending ID order.
+        """
+        return self.store.scan(after, limit)
+
+    def get(self, id):
+        return self.store.get(id)
+
+    def get_many(self, ids):
+        """
+        Returns:
+            list: movies in the same order as `ids`, None for unknown ids.
+        """
+        return self.store.get_many(ids)
+
+    def find_by_title(self, title):
+        return self.store.find("title", title)
+
+    def find_by_director(self, director):
+        return self.store.find("director", director)
+
+    def search(self, query, limit=10, offset=0):
+        """
+        Full-text prefix search over titles and directors, see SearchIndex.search.
+
+        Returns:
+            list: the matching movies for the requested page, best match first.
+        """
+        # l'index de recherche est modifié sous le même verrou par add/update/remove
+        with self._lock:
+            ids = self._search.search(query, limit, offset)
+        return self.store.get_many(ids)
+
+    def changes_since(self, version):
+        """
+        Returns:
+            tuple: (current version, IDs of the movies changed after `version`),
+            or (current version, None) if `version` is unknown or older than
+            the retained history: the caller must then drop everything.
+        """
+        with self._lock:
+            if version > self.version:
+                return self.version, None
+            if version == self.version:
+                return self.version, []
+            if not self._changes or self._changes[0][0] > version + 1:
+                return self.version, None
+            ids = [id for v, id in self._changes if v > version]
+        return self.version, list(dict.fromkeys(ids))
+
+    def _record_change(self, id):
+        self.version += 1
+        self._changes.append((self.version, id))
+
+    def add(self, movie):
+        """
+        Add a new movie to the catalog.
+
+        Raises:
+            KeyError: if a movie with the same ID already exists.
+        """
+        with self._lock:
+            if self.store.get(movie["id"]) is not None:
+                raise KeyError(movie["id"])
+            self.store.put(movie)
+            self._search.add(movie)
+            self._record_change(movie["id"])
+        return movie
+
+    def update(self, id, **fields):
+        """
+        Update fields of an existing movie, re-indexing it if needed.
+
+        Returns:
+            dict: the updated movie, or None if the ID is unknown.
+        """
+        with self._lock:
+            movie = self.store.get(id)
+            if movie is None:
+                return None
+            self._search.remove(movie)
+            # nouvel enregistrement : un lecteur qui tient l'ancien ne voit jamais une mise à jour partielle
+            movie = {**movie, **fields}
+            self.store.put(movie)
+            self._search.add(movie)
+            self._record_change(id)
+        return movie
+
+    def remove(self, id):
+        """
+        Returns:
+            dict: the removed movie, or None if the ID is unknown.
+        """
+        with self._lock:
+            movie = self.store.get(id)
+            if movie is not None:
+                self.store.delete(id)
+                self._search.remove(movie)
+                self._record_change(id)
+        return movie
@@ -1,9 +1,15 @@
+import os, sys
+# paquet partagé common/ : copié dans /app par le Dockerfile, dans le dossier parent en local
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from ariadne import graphql_sync, make_executable_schema, load_schema_from_path, ObjectType, QueryType, MutationType
 from flask import Flask, request, jsonify, make_response
 import time, json, requests
 from werkzeug.exceptions import NotFound
 from flask_cors import CORS
 import resolvers as r
+from graphql import GraphQLError
+from ariadne import format_error
+from common.query_cache import QueryCache, PersistedQueryNotFound, skip_validation
 import config
 
 app = Flask(__name__)
@@ -19,14 +25,20 @@ mutation = MutationType()
 movie = ObjectType('Movie')
 
 query.set_field('movie_with_id', r.movie_with_id)
+query.set_field('movies_by_ids', r.movies_by_ids)
 query.set_field('movie_with_title', r.movie_with_title)
+query.set_field('movies_with_director', r.movies_with_director)
+query.set_field('search_movies', r.search_movies)
 query.set_field('movies_json', r.movies_json)
+query.set_field('movies_connection', r.movies_connection)
+query.set_field('movie_changes', r.movie_changes)
 
 mutation.set_field('add_movie', r.add_movie)
 mutation.set_field('update_movie_rate', r.update_movie_rate)
 mutation.set_field('remove_movie_with_id', r.remove_movie_with_id)
 
 schema = make_executable_schema(type_defs, movie, query, mutation)
+query_cache = QueryCache(schema, max_size=config.QUERY_CACHE_SIZE)
 
 # page d’accueil du service
 @app.route("/", methods=['GET'])
@@ -43,15 +55,42 @@ def home():
 @app.route('/graphql', methods=['POST'])
 def graphql_server():
     data = request.get_json()
+    # document analysé et validé mis en cache (ou requête persistée envoyée par hash)
+    try:
+        data, document, errors = query_cache.prepare(data)
+    except PersistedQueryNotFound as error:
+        return jsonify({"errors": [format_error(error)]}), 200
+    except GraphQLError as error:
+        return jsonify({"errors": [format_error(error, app.debug)]}), 400
+    if errors:
+        return jsonify({"errors": [format_error(error, app.debug) for error in errors]}), 400
+
     success, result = graphql_sync(
                         schema,
                         data,
                         context_value=None,
+                        query_document=document,
+                        query_validator=skip_validation,
                         debug=app.debug
                     )
     status_code = 200 if success else 400
     return jsonify(result), status_code
 
+# compteurs du cache de requêtes GraphQL
+@app.route('/graphql/cache', methods=['GET'])
+def graphql_cache_stats():
+    return jsonify(query_cache.stats()), 200
+
+# compteurs du cache de vérification admin
+@app.route('/admin_cache', methods=['GET'])
+def admin_cache_stats():
+    return jsonify(r.admin_cache.stats()), 200
+
+# compteurs du client HTTP vers les autres services
+@app.route('/http_client', methods=['GET'])
+def http_client_stats():
+    return jsonify(r.http.stats()), 200
+
 if __name__ == "__main__":
     #p = sys.argv[1]
     print("Server running in port %s"%(config.MOVIE_PORT))
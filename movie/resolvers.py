@@ -1,11 +1,53 @@
-import json
 from graphql import GraphQLError
-import requests, time
+import requests
 import config
-
-# cache local pour stocker si un user est admin
-# format : { "user_id": {"is_admin": True/False, "timestamp": 123456789} }
-user_admin_cache = {}
+from catalog import MovieCatalog, MOVIE_INDEXES
+from common.storage import open_store
+from common.admin_cache import AdminCache, UserNotFound
+from common.http_client import HttpClient
+from common.tokens import InvalidToken, is_token, parse_keys, verify_token
+from common.pagination import DEFAULT_PAGE_SIZE, keyset_page, connection
+
+# nombre maximal de résultats renvoyés par search_movies
+MAX_SEARCH_LIMIT = 100
+
+# client HTTP partagé : connexions keep-alive par hôte, délais et nouvelles tentatives
+http = HttpClient(
+    connect_timeout=config.HTTP_CONNECT_TIMEOUT,
+    read_timeout=config.HTTP_READ_TIMEOUT,
+    retries=config.HTTP_RETRIES,
+    backoff=config.HTTP_RETRY_BACKOFF,
+    pool_size=config.HTTP_POOL_SIZE,
+)
+
+# cache partagé du statut admin (LRU + TTL, un seul appel au service User par utilisateur)
+def fetch_is_admin(user_id):
+    """Interroge le service User ; lève UserNotFound si l'utilisateur n'existe pas."""
+    r = http.get(f"{config.USER_BASE_URL}/users/{user_id}/is_admin")
+    if r.status_code == 404:
+        raise UserNotFound(user_id)
+    r.raise_for_status()
+    return r.json().get("is_admin", False)
+
+def fetch_is_admin_many(user_ids):
+    """Interroge le service User pour plusieurs utilisateurs ; les inconnus sont absents du résultat."""
+    r = http.post(f"{config.USER_BASE_URL}/users/is_admin:batch", idempotent=True, json={"ids": user_ids})
+    r.raise_for_status()
+    return r.json()["is_admin"]
+
+admin_cache = AdminCache(
+    fetch_is_admin,
+    ttl=config.CACHE_TTL,
+    max_size=config.ADMIN_CACHE_SIZE,
+    negative_ttl=config.ADMIN_CACHE_NEGATIVE_TTL,
+    refresh_ahead=config.ADMIN_CACHE_REFRESH_AHEAD,
+    fetch_many=fetch_is_admin_many if config.ADMIN_CACHE_BATCH_WINDOW > 0 else None,
+    batch_window=config.ADMIN_CACHE_BATCH_WINDOW,
+    batch_size=config.ADMIN_CACHE_BATCH_SIZE,
+)
+
+# clés de vérification des jetons signés par le service User
+token_keys = parse_keys(config.TOKEN_KEYS)
 
 # fonction utilitaire pour vérifier admin
 def verify_admin(user_id):
@@ -20,53 +62,74 @@ def verify_admin(user_id):
                is_admin indicates if the user has admin privileges.
                error_response is a Flask response object if verification fails.
     """
-    now = time.time()
-
-    # vérifie si on a une valeur en cache et qu'elle est encore valide
-    if user_id in user_admin_cache:
-        cached = user_admin_cache[user_id]
-        if now - cached["timestamp"] < config.CACHE_TTL:
-            return cached["is_admin"], None
-
-    # sinon appelle le microservice User
+    # jeton signé : vérifié localement, sans appel au service User
+    if is_token(user_id):
+        try:
+            return verify_token(user_id, token_keys)[1], None
+        except InvalidToken as e:
+            raise GraphQLError(f"Invalid token: {e}")
     try:
-        r = requests.get(f"{config.USER_BASE_URL}/users/{user_id}/is_admin")
-        if r.status_code == 200:
-            data = r.json()
-            is_admin = data.get("is_admin", False)
-            user_admin_cache[user_id] = {"is_admin": is_admin, "timestamp": now}
-            return is_admin, None
-        else:
-            raise GraphQLError("Unable to verify user")
+        return admin_cache.get(user_id), None
+    except (UserNotFound, requests.exceptions.HTTPError):
+        raise GraphQLError("Unable to verify user")
     except requests.exceptions.RequestException:
         raise GraphQLError("User service unsearchable")
 
-
-with open('{}/databases/movies.json'.format("."), "r") as jsf:
-    movies = json.load(jsf)["movies"]
-    
-def write(movies_data):
-    with open('{}/databases/movies.json'.format("."), 'w') as f:
-        full = {}
-        full['movies'] = movies_data
-        json.dump(full, f)
+# stockage choisi dans config.py (STORAGE_BACKEND) : JSON + journal, ou SQLite
+store = open_store(
+    config.STORAGE_BACKEND, './databases/movies.json', 'movies', key='id',
+    indexes=MOVIE_INDEXES, compact_every=config.STORAGE_COMPACT_EVERY
+)
+catalog = MovieCatalog(store, history=config.MOVIE_CHANGES_HISTORY)
 
 def movies_json(_,info, user_id):
     _, error = verify_admin(user_id)
     if error:
         return error
     
-    return movies
+    return catalog.all()
+
+def movies_connection(_, info, user_id, first=DEFAULT_PAGE_SIZE, after=None):
+    """
+    Cursor-paginated list of movies, ordered by ID.
+
+    Args:
+        first (int): maximum number of movies to return.
+        after (str): cursor of the last movie of the previous page.
+
+    Returns:
+        dict: a Relay connection (edges, pageInfo, totalCount).
+    """
+    _, error = verify_admin(user_id)
+    if error:
+        return error
+
+    movies, has_next_page = keyset_page(catalog, first, after)
+    return connection(movies, has_next_page, "id", len(catalog))
 
 def movie_with_id(_, info, user_id, id):
     _, error = verify_admin(user_id)
     if error:
         return error
     
-    for movie in movies:
-        if movie["id"] == id:
-            return movie
-    raise GraphQLError("Movie not found with id: " + id)
+    movie = catalog.get(id)
+    if movie is None:
+        raise GraphQLError("Movie not found with id: " + id)
+    return movie
+
+
+def movies_by_ids(_, info, user_id, ids):
+    """
+    Batch lookup of movies by id, served from the catalog's id index.
+
+    Returns:
+        list: movies in the same order as `ids`, None for unknown ids.
+    """
+    _, error = verify_admin(user_id)
+    if error:
+        return error
+
+    return catalog.get_many(ids)
 
 
 def movie_with_title(_,info, user_id, title):
@@ -74,10 +137,58 @@ def movie_with_title(_,info, user_id, title):
     if error:
         return error
     
-    for movie in movies:
-        if str(movie["title"]) == title:
-            return movie
-    raise GraphQLError("Movie not found with title : " + title)
+    found = catalog.find_by_title(title)
+    if not found:
+        raise GraphQLError("Movie not found with title : " + title)
+    return found[0]
+
+def movies_with_director(_, info, user_id, director):
+    _, error = verify_admin(user_id)
+    if error:
+        return error
+
+    return catalog.find_by_director(director)
+
+def search_movies(_, info, user_id, query, limit=10, offset=0):
+    """
+    Type-ahead search over movie titles and directors.
+
+    Every word of `query` is matched as a prefix, ignoring case and accents.
+
+    Returns:
+        list: the matching movies for the requested page, best match first.
+    """
+    _, error = verify_admin(user_id)
+    if error:
+        return error
+
+    if limit < 0 or offset < 0:
+        raise GraphQLError("limit and offset must be positive")
+
+    return catalog.search(query, min(limit, MAX_SEARCH_LIMIT), offset)
+
+def movie_changes(_, info, user_id, since=0, epoch=None):
+    """
+    Change feed of the catalog, polled by the services that cache movies.
+
+    Returns:
+        dict: the current epoch and version, and the IDs of the movies added,
+        updated or removed since version `since`. `reset` is true when the
+        caller's version cannot be served (other epoch or history too short):
+        it must then drop its whole cache.
+    """
+    _, error = verify_admin(user_id)
+    if error:
+        return error
+
+    version, ids = catalog.changes_since(since)
+    reset = ids is None or (epoch is not None and epoch != catalog.epoch)
+    return {
+        "epoch": catalog.epoch,
+        "version": version,
+        "ids": [] if reset else ids,
+        "reset": reset,
+    }
 
 def add_movie(_, info, user_id,  id, title, rating, director):
     is_admin, error = verify_admin(user_id)
@@ -88,17 +199,16 @@ def add_movie(_, info, user_id,  id, title, rating, director):
     if not is_admin:
         raise GraphQLError("Unauthorized: admin access required")
     
-    for movie in movies:
-        if str(movie["id"]) == id:
-            raise GraphQLError("Movie ID already exists : " + id)
     newmovie = {
         "id": id,
         "title" : title,
         "rating" : rating,
         "director" : director
     }
-    movies.append(newmovie)
-    write(movies)
+    try:
+        catalog.add(newmovie)
+    except KeyError:
+        raise GraphQLError("Movie ID already exists : " + id)
     return newmovie
 
 def update_movie_rate(_,info, user_id, id,rating):
@@ -106,16 +216,9 @@ def update_movie_rate(_,info, user_id, id,rating):
     if error:
         return error
     
-    newmovie = None
-    for movie in movies:
-        if movie['id'] == id:
-            movie['rating'] = rating
-            newmovie = movie
-        
+    newmovie = catalog.update(id, rating=rating)
     if newmovie is None:
         raise GraphQLError("Movie not found with id: " + id)
-    
-    write(movies)
     return newmovie
 
 def remove_movie_with_id(_, info, user_id,  id):
@@ -127,15 +230,7 @@ def remove_movie_with_id(_, info, user_id,  id):
     if not is_admin:
         raise GraphQLError("Unauthorized: admin access required")
     
-    removed_movie = None
-        
-    for movie in movies:
-        if str(movie["id"]) == id:
-            movies.remove(movie)
-            removed_movie = movie
-        
+    removed_movie = catalog.remove(id)
     if removed_movie is None:
         raise GraphQLError("Movie not found with id: " + id)
-
-    write(movies)
-    return movie
\ No newline at end of file
+    return removed_movie
@@ -0,0 +1,127 @@
+import bisect
+import heapq
+import re
+import unicodedata
+
+# poids des champs indexés : un titre qui correspond compte plus qu'un réalisateur
+FIELD_WEIGHTS = {"title": 2, "director": 1}
+
+# un token complet rapporte plus qu'un simple préfixe
+EXACT_BONUS = 2
+
+# en dessous de cette longueur, un mot ne correspond qu'à des tokens complets :
+# un préfixe d'une lettre toucherait une grande partie du catalogue
+MIN_PREFIX_LENGTH = 2
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def normalize(text):
+    """
+    Lowercase a text and strip its accents ("Amélie" -> "amelie").
+    """
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(normalize(text))
+
+
+class SearchIndex:
+    """
+    Inverted token index over movie titles and directors.
+
+    Each token maps to the movies containing it, with the summed weight of
+    the fields it appears in. Tokens are also kept in a sorted list so that
+    prefix matching is a binary search followed by a short scan.
+    """
+
+    def __init__(self):
+        self._postings = {}       # token -> { movie_id: weight }
+        self._tokens = []         # tokens triés, pour la recherche par préfixe
+        self._doc_tokens = {}     # movie_id -> tokens indexés pour ce film
+        self._sort_keys = {}      # movie_id -> clé de tri secondaire (titre normalisé)
+
+    def add(self, movie):
+        id = str(movie["id"])
+        weights = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(movie[field]):
+                weights[token] = weights.get(token, 0) + weight
+
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                bisect.insort(self._tokens, token)
+            postings[id] = weight
+        self._doc_tokens[id] = list(weights)
+        self._sort_keys[id] = normalize(movie["title"])
+
+    def remove(self, movie):
+        id = str(movie["id"])
+        for token in self._doc_tokens.pop(id, ()):
+            postings = self._postings[token]
+            postings.pop(id, None)
+            if not postings:
+                del self._postings[token]
+                del self._tokens[bisect.bisect_left(self._tokens, token)]
+        self._sort_keys.pop(id, None)
+
+    def search(self, query, limit=10, offset=0):
+        """
+        Search movies whose title or director contain every word of the query.
+
+        Each query word matches indexed tokens it is a prefix of (whole tokens
+        only for words shorter than MIN_PREFIX_LENGTH), ignoring case and
+        accents. Full-word matches and title matches rank higher;
+        ties are broken by title.
+
+        Returns:
+            list: IDs of the matching movies for the requested page.
+        """
+        scores = None
+        for word in tokenize(query):
+            word_scores = self._match_prefix(word)
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {id: score + word_scores[id] for id, score in scores.items() if id in word_scores}
+            if not scores:
+                return []
+
+        if not scores:
+            return []
+
+        # les scores prennent peu de valeurs distinctes : on regroupe par score
+        # puis on ne trie par titre que ce qui est nécessaire pour la page
+        buckets = {}
+        for id, score in scores.items():
+            buckets.setdefault(score, []).append(id)
+
+        wanted = offset + limit
+        ranked = []
+        for score in sorted(buckets, reverse=True):
+            ids = buckets[score]
+            ranked.extend(heapq.nsmallest(wanted - len(ranked), ids, key=self._sort_keys.__getitem__))
+            if len(ranked) >= wanted:
+                break
+        return ranked[offset:]
+
+    def _match_prefix(self, word):
+        if len(word) < MIN_PREFIX_LENGTH:
+            postings = self._postings.get(word, {})
+            return {id: weight * EXACT_BONUS for id, weight in postings.items()}
+
+        matches = {}
+        for i in range(bisect.bisect_left(self._tokens, word), len(self._tokens)):
+            token = self._tokens[i]
+            if not token.startswith(word):
+                break
+            bonus = EXACT_BONUS if token == word else 1
+            for id, weight in self._postings[token].items():
+                score = weight * bonus
+                if score > matches.get(id, 0):
+                    matches[id] = score
+        return matches
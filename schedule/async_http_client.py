@@ -0,0 +1,77 @@
+import asyncio
+import random
+from urllib.parse import urlsplit
+
+import httpx
+
+from common.http_client import RETRY_STATUSES
+
+
+class AsyncHttpClient:
+    """
+    Équivalent asyncio de HttpClient, pour le serveur gRPC grpc.aio.
+
+    Les appels ne bloquent pas la boucle : des milliers de RPC peuvent
+    attendre une réponse en même temps. Les connexions keep-alive sont
+    partagées (au plus `pool_size` par hôte), avec les mêmes délais et la
+    même politique de nouvelles tentatives que HttpClient.
+    """
+
+    def __init__(self, connect_timeout=1.0, read_timeout=5.0, retries=2, backoff=0.05, pool_size=20):
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+        self._stats = {}   # hôte -> compteurs
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, idempotent=True, **kwargs)
+
+    async def post(self, url, idempotent=False, **kwargs):
+        return await self.request("POST", url, idempotent=idempotent, **kwargs)
+
+    async def request(self, method, url, idempotent=False, **kwargs):
+        stats = self._host_stats(urlsplit(url).netloc)
+        attempts = 1 + (self.retries if idempotent else 0)
+
+        for attempt in range(attempts):
+            stats["requests"] += 1
+            stats["in_flight"] += 1
+            stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+            # toutes les connexions du pool sont prises : la requête attend qu'une se libère
+            if stats["in_flight"] > self.pool_size:
+                stats["saturated"] += 1
+            try:
+                response = await self._client.request(method, url, **kwargs)
+            except httpx.TransportError:
+                stats["errors"] += 1
+                if attempt + 1 == attempts:
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt + 1 == attempts:
+                    return response
+                stats["errors"] += 1
+            finally:
+                stats["in_flight"] -= 1
+
+            stats["retries"] += 1
+            await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+
+    def stats(self):
+        return {host: dict(stats, pool_size=self.pool_size) for host, stats in self._stats.items()}
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    def _host_stats(self, host):
+        # pas de verrou : la boucle asyncio n'exécute qu'une coroutine à la fois
+        stats = self._stats.get(host)
+        if stats is None:
+            stats = self._stats[host] = {
+                "requests": 0, "in_flight": 0, "max_in_flight": 0,
+                "saturated": 0, "retries": 0, "errors": 0,
+            }
+        return stats
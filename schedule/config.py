@@ -24,4 +24,52 @@ MOVIE_BASE_URL = f"http://{MOVIE_HOST}:{MOVIE_PORT}"
 SCHEDULE_HOST = 'schedule' if USE_DOCKER else 'localhost'
 SCHEDULE_PORT = int(os.getenv('SCHEDULE_PORT', 3202))
 
-CACHE_TTL = int(os.getenv('CACHE_TTL', 60))  # Time-to-live en secondes
\ No newline at end of file
+# Serveur gRPC : "threads" (grpc.server, SCHEDULE_WORKERS threads) ou "aio" (grpc.aio, asyncio)
+SCHEDULE_SERVER = os.getenv('SCHEDULE_SERVER', 'threads')
+SCHEDULE_WORKERS = int(os.getenv('SCHEDULE_WORKERS', 10))
+# nombre max de RPC en cours en mode aio (0 = pas de limite)
+SCHEDULE_MAX_CONCURRENT_RPCS = int(os.getenv('SCHEDULE_MAX_CONCURRENT_RPCS', 0))
+
+# Mesures des RPC (durées, codes de statut, étapes) en texte sur http://<hôte>:<port>/metrics (0 = désactivé)
+SCHEDULE_METRICS_HOST = os.getenv('SCHEDULE_METRICS_HOST', '127.0.0.1')
+SCHEDULE_METRICS_PORT = int(os.getenv('SCHEDULE_METRICS_PORT', 3212))
+
+CACHE_TTL = int(os.getenv('CACHE_TTL', 60))  # Time-to-live en secondes
+ADMIN_CACHE_SIZE = int(os.getenv('ADMIN_CACHE_SIZE', 10000))  # nombre max d'utilisateurs en cache
+ADMIN_CACHE_NEGATIVE_TTL = int(os.getenv('ADMIN_CACHE_NEGATIVE_TTL', 10))  # TTL des utilisateurs inconnus
+ADMIN_CACHE_REFRESH_AHEAD = float(os.getenv('ADMIN_CACHE_REFRESH_AHEAD', 0.8))  # fraction du TTL avant rechargement
+ADMIN_CACHE_BATCH_WINDOW = float(os.getenv('ADMIN_CACHE_BATCH_WINDOW', 0.005))  # secondes pour regrouper les vérifications (0 = une requête par utilisateur)
+ADMIN_CACHE_BATCH_SIZE = int(os.getenv('ADMIN_CACHE_BATCH_SIZE', 100))  # utilisateurs max par requête groupée
+
+# Appels HTTP entre services : délais (secondes), tentatives des lectures et taille du pool par hôte
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 1.0))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 5.0))
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 2))
+HTTP_RETRY_BACKOFF = float(os.getenv('HTTP_RETRY_BACKOFF', 0.05))
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 20))
+
+# Cache des films : taille max, TTL de secours (secondes) et période de lecture du flux movie_changes
+MOVIE_CACHE_SIZE = int(os.getenv('MOVIE_CACHE_SIZE', 10000))
+MOVIE_CACHE_TTL = int(os.getenv('MOVIE_CACHE_TTL', 300))
+MOVIE_CACHE_POLL_INTERVAL = float(os.getenv('MOVIE_CACHE_POLL_INTERVAL', 2.0))
+# Utilisateur sous lequel le service fait ses propres appels (comme Booking vers User)
+SERVICE_USER_ID = os.getenv('SERVICE_USER_ID', 'chris_rivers')
+
+# GetScheduleRange : nombre de dates lues dans l'index à la fois
+SCHEDULE_RANGE_CHUNK = int(os.getenv('SCHEDULE_RANGE_CHUNK', 50))
+# ImportSchedule : nombre de films distincts vérifiés auprès du service Movie par appel
+SCHEDULE_IMPORT_BATCH = int(os.getenv('SCHEDULE_IMPORT_BATCH', 200))
+# nombre de dates dont les films sont récupérés à l'avance pendant l'envoi d'un flux
+SCHEDULE_READ_AHEAD = int(os.getenv('SCHEDULE_READ_AHEAD', 4))
+# threads partagés par les flux pour cette récupération anticipée (serveur "threads")
+SCHEDULE_HYDRATE_WORKERS = int(os.getenv('SCHEDULE_HYDRATE_WORKERS', 16))
+
+# Jetons signés (HMAC) acceptés à la place de user_id : clés "kid:secret" séparées par des virgules.
+# Toutes les clés listées sont acceptées, ce qui permet de les faire tourner sans interruption.
+TOKEN_KEYS = os.getenv('TOKEN_KEYS', '')
+
+# Stockage : backend "json" (instantané + journal, tout en mémoire) ou "sqlite" (base embarquée)
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'json')
+
+# Stockage : nombre de mutations journalisées avant l'écriture d'un nouvel instantané
+STORAGE_COMPACT_EVERY = int(os.getenv('STORAGE_COMPACT_EVERY', 1000))
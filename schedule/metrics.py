@@ -0,0 +1,226 @@
+import asyncio
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import grpc
+
+# bornes des histogrammes de durée, en secondes
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# RPC en cours dans ce thread / cette tâche asyncio, pour rattacher les sous-étapes à leur méthode
+_current_method = contextvars.ContextVar("current_method", default="")
+
+
+class Histogram:
+    """Histogramme cumulatif à bornes fixes (format Prometheus)."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)   # dernière case : au-delà de la plus grande borne
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def render(self, name, labels):
+        lines, cumulative = [], 0
+        for bound, count in zip(BUCKETS + ("+Inf",), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class Metrics:
+    """
+    Mesures du serveur gRPC Schedule :
+    - par méthode : histogramme des durées, nombre d'appels par code de
+      statut, nombre de RPC en cours ;
+    - par méthode et sous-étape (`span`) : histogramme des durées, pour voir
+      ce qui revient à la vérification admin, aux appels User et Movie...
+    Les sous-étapes hors RPC (rechargement du cache admin en arrière-plan)
+    sont rattachées à la méthode "background".
+    `gauges` fournit des valeurs lues au moment de l'export (stats des caches).
+    """
+
+    def __init__(self, gauges=None):
+        self.gauges = gauges or {}
+        self._durations = {}   # méthode -> Histogram
+        self._codes = {}       # (méthode, code) -> nombre
+        self._in_flight = {}   # méthode -> nombre
+        self._spans = {}       # (méthode, étape) -> Histogram
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def rpc(self, method, context):
+        """Mesure un RPC ; le code de statut est lu sur `context` à la fin."""
+        # set() plutôt que reset() : un flux abandonné peut être fermé depuis un autre contexte
+        previous = _current_method.get()
+        _current_method.set(method)
+        with self._lock:
+            self._in_flight[method] = self._in_flight.get(method, 0) + 1
+        start = time.perf_counter()
+        try:
+            yield
+        except (GeneratorExit, asyncio.CancelledError):
+            # client parti au milieu d'un flux
+            self._finish(method, start, context.code() or grpc.StatusCode.CANCELLED)
+            raise
+        except BaseException:
+            self._finish(method, start, context.code() or grpc.StatusCode.UNKNOWN)
+            raise
+        else:
+            self._finish(method, start, context.code() or grpc.StatusCode.OK)
+        finally:
+            _current_method.set(previous)
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            key = (_current_method.get() or "background", name)
+            with self._lock:
+                histogram = self._spans.get(key)
+                if histogram is None:
+                    histogram = self._spans[key] = Histogram()
+                histogram.observe(elapsed)
+
+    def render(self):
+        """Export au format texte Prometheus."""
+        with self._lock:
+            lines = ["# TYPE schedule_rpc_duration_seconds histogram"]
+            for method, histogram in sorted(self._durations.items()):
+                lines += histogram.render("schedule_rpc_duration_seconds", f'method="{method}"')
+            lines.append("# TYPE schedule_rpc_total counter")
+            for (method, code), count in sorted(self._codes.items()):
+                lines.append(f'schedule_rpc_total{{method="{method}",code="{code}"}} {count}')
+            lines.append("# TYPE schedule_rpc_in_flight gauge")
+            for method, count in sorted(self._in_flight.items()):
+                lines.append(f'schedule_rpc_in_flight{{method="{method}"}} {count}')
+            lines.append("# TYPE schedule_span_duration_seconds histogram")
+            for (method, name), histogram in sorted(self._spans.items()):
+                lines += histogram.render("schedule_span_duration_seconds", f'method="{method}",span="{name}"')
+        for name, read in self.gauges.items():
+            lines.append(f"# TYPE {name} gauge")
+            lines += [f'{name}{{stat="{stat}"}} {value}' for stat, value in sorted(read().items())]
+        return "\n".join(lines) + "\n"
+
+    def _finish(self, method, start, code):
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._in_flight[method] -= 1
+            histogram = self._durations.get(method)
+            if histogram is None:
+                histogram = self._durations[method] = Histogram()
+            histogram.observe(elapsed)
+            key = (method, code.name)
+            self._codes[key] = self._codes.get(key, 0) + 1
+
+
+def _method_name(handler_call_details):
+    return handler_call_details.method.rsplit("/", 1)[-1]
+
+
+def _rebuild(handler, unary_unary, unary_stream, stream_unary, stream_stream):
+    """Recrée un RpcMethodHandler avec d'autres fonctions mais les mêmes (dé)sérialiseurs."""
+    serializers = {
+        "request_deserializer": handler.request_deserializer,
+        "response_serializer": handler.response_serializer,
+    }
+    if handler.unary_unary:
+        return grpc.unary_unary_rpc_method_handler(unary_unary(handler.unary_unary), **serializers)
+    if handler.unary_stream:
+        return grpc.unary_stream_rpc_method_handler(unary_stream(handler.unary_stream), **serializers)
+    if handler.stream_unary:
+        return grpc.stream_unary_rpc_method_handler(stream_unary(handler.stream_unary), **serializers)
+    return grpc.stream_stream_rpc_method_handler(stream_stream(handler.stream_stream), **serializers)
+
+
+class MetricsInterceptor(grpc.ServerInterceptor):
+    """Intercepteur du serveur à threads : chaque RPC est mesuré par `metrics.rpc`."""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def intercept_service(self, continuation, handler_call_details):
+        handler = continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = _method_name(handler_call_details)
+        metrics = self.metrics
+
+        def single(behavior):
+            def wrapper(request, context):
+                with metrics.rpc(method, context):
+                    return behavior(request, context)
+            return wrapper
+
+        def stream(behavior):
+            def wrapper(request, context):
+                with metrics.rpc(method, context):
+                    yield from behavior(request, context)
+            return wrapper
+
+        return _rebuild(handler, single, stream, single, stream)
+
+
+class AsyncMetricsInterceptor(grpc.aio.ServerInterceptor):
+    """MetricsInterceptor pour le serveur grpc.aio."""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    async def intercept_service(self, continuation, handler_call_details):
+        handler = await continuation(handler_call_details)
+        if handler is None:
+            return None
+        method = _method_name(handler_call_details)
+        metrics = self.metrics
+
+        def single(behavior):
+            async def wrapper(request, context):
+                with metrics.rpc(method, context):
+                    return await behavior(request, context)
+            return wrapper
+
+        def stream(behavior):
+            async def wrapper(request, context):
+                with metrics.rpc(method, context):
+                    async for response in behavior(request, context):
+                        yield response
+            return wrapper
+
+        return _rebuild(handler, single, stream, single, stream)
+
+
+def serve_metrics(metrics, host, port):
+    """Sert `GET /metrics` (texte) dans un thread, à côté du serveur gRPC."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
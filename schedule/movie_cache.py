@@ -0,0 +1,187 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Flight:
+    """Chargement en cours d'un film, partagé par toutes les requêtes qui l'attendent."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self._waiters = []   # futures asyncio à réveiller, avec leur boucle
+
+    def wait_async(self):
+        """
+        Future asyncio terminée avec le chargement : l'attente n'occupe pas un
+        thread (les threads de la boucle servent aussi à la résolution DNS).
+        A appeler sous le verrou du cache.
+        """
+        future = asyncio.get_running_loop().create_future()
+        if self.done.is_set():
+            future.set_result(None)
+        else:
+            self._waiters.append(future)
+        return future
+
+    def finish(self):
+        self.done.set()
+        for future in self._waiters:
+            future.get_loop().call_soon_threadsafe(_resolve, future)
+        self._waiters = []
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class MovieCache:
+    """
+    Cache borné (LRU + TTL) des MovieData, indexé par ID de film.
+
+    `get_many(ids, fetch_many)` sert les films en cache et récupère les
+    autres en un seul appel à `fetch_many(ids) -> { id: MovieData ou None }`.
+    Un film déjà en cours de chargement par une autre requête n'est pas
+    redemandé : on attend le résultat de cet appel.
+
+    Le service Movie signale ses modifications (voir `movie_changes`) : les
+    films modifiés sont retirés du cache avec `invalidate`, ou tout le cache
+    avec `clear`. Le TTL borne la durée de vie d'une entrée si ce signal
+    n'arrive pas.
+    """
+
+    def __init__(self, ttl=300, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()  # id -> (MovieData, expire à)
+        self._flights = {}             # id -> _Flight en cours
+        self._generation = 0           # incrémenté à chaque invalidation
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_many(self, ids, fetch_many):
+        """
+        Returns:
+            dict: { id: MovieData }, sans les films inconnus du service Movie.
+
+        Raises:
+            l'exception levée par `fetch_many`.
+        """
+        found, to_fetch, waiting, generation = self._reserve(ids)
+        if to_fetch:
+            try:
+                fetched, error = fetch_many(to_fetch), None
+            except Exception as e:
+                fetched, error = {}, e
+            self._complete(to_fetch, fetched, error, generation, found)
+        for id, flight in waiting:
+            flight.done.wait()
+            self._collect(id, flight, found)
+        return found
+
+    async def get_many_async(self, ids, fetch_many):
+        """
+        Comme get_many, pour le serveur asyncio : `fetch_many` est une coroutine
+        et l'attente d'un chargement en cours ne bloque pas la boucle.
+        """
+        found, to_fetch, waiting, generation = self._reserve(ids)
+        if to_fetch:
+            try:
+                fetched, error = await fetch_many(to_fetch), None
+            except asyncio.CancelledError:
+                # RPC annulé : les requêtes qui attendent ces films ne doivent pas rester bloquées
+                try:
+                    self._complete(to_fetch, {}, RuntimeError("Movie fetch cancelled"), generation, found)
+                except RuntimeError:
+                    pass
+                raise
+            except Exception as e:
+                fetched, error = {}, e
+            self._complete(to_fetch, fetched, error, generation, found)
+        for id, flight in waiting:
+            with self._lock:
+                done = flight.wait_async()
+            await done
+            self._collect(id, flight, found)
+        return found
+
+    def invalidate(self, ids):
+        with self._lock:
+            self._generation += 1
+            for id in ids:
+                if self._entries.pop(id, None) is not None:
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _reserve(self, ids):
+        """Sépare les films en cache, ceux à charger et ceux déjà en cours de chargement."""
+        now = time.monotonic()
+        found, to_fetch, waiting = {}, [], []
+        with self._lock:
+            for id in dict.fromkeys(ids):
+                entry = self._entries.get(id)
+                if entry is not None and now < entry[1]:
+                    self._entries.move_to_end(id)
+                    self.hits += 1
+                    found[id] = entry[0]
+                elif id in self._flights:
+                    self.coalesced += 1
+                    waiting.append((id, self._flights[id]))
+                else:
+                    self.misses += 1
+                    self._flights[id] = _Flight()
+                    to_fetch.append(id)
+            return found, to_fetch, waiting, self._generation
+
+    def _complete(self, ids, fetched, error, generation, found):
+        with self._lock:
+            # une invalidation pendant l'appel : la réponse est peut-être déjà périmée, on ne la garde pas
+            keep = error is None and generation == self._generation
+            expires_at = time.monotonic() + self.ttl
+            flights = [self._flights.pop(id) for id in ids]
+            for id, flight in zip(ids, flights):
+                flight.error = error
+                flight.value = fetched.get(id)
+                if keep and flight.value is not None:
+                    self._entries[id] = (flight.value, expires_at)
+                    self._entries.move_to_end(id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            for flight in flights:
+                flight.finish()
+
+        if error is not None:
+            raise error
+        found.update((id, movie) for id, movie in fetched.items() if movie is not None)
+
+    @staticmethod
+    def _collect(id, flight, found):
+        if flight.error is not None:
+            raise flight.error
+        if flight.value is not None:
+            found[id] = flight.value
@@ -1,83 +1,469 @@
+import os, sys
+# paquet partagé common/ : copié dans /app par le Dockerfile, dans le dossier parent en local
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import asyncio
+import base64
+import binascii
+import contextvars
 import grpc
+import httpx
 from concurrent import futures
 import schedule_pb2
 import schedule_pb2_grpc
-import json
+import itertools
+import logging
 import requests
+import threading
 import time
+from collections import deque
 import config
-
-user_admin_cache = {}
+from common.storage import open_store
+from common.admin_cache import AdminCache, UserNotFound
+from common.http_client import HttpClient
+from async_http_client import AsyncHttpClient
+from movie_cache import MovieCache
+from metrics import AsyncMetricsInterceptor, Metrics, MetricsInterceptor, serve_metrics
+from schedule_index import ScheduleIndex, SCHEDULE_INDEXES
+from common.query_cache import query_hash
+from common.tokens import InvalidToken, is_token, parse_keys, verify_token
+
+logger = logging.getLogger(__name__)
+
+# client HTTP partagé : connexions keep-alive par hôte, délais et nouvelles tentatives
+http = HttpClient(
+    connect_timeout=config.HTTP_CONNECT_TIMEOUT,
+    read_timeout=config.HTTP_READ_TIMEOUT,
+    retries=config.HTTP_RETRIES,
+    backoff=config.HTTP_RETRY_BACKOFF,
+    pool_size=config.HTTP_POOL_SIZE,
+)
+
+def fetch_is_admin(user_id):
+    """Interroge le service User ; lève UserNotFound si l'utilisateur n'existe pas."""
+    with metrics.span("user_call"):
+        r = http.get(f"{config.USER_BASE_URL}/users/{user_id}/is_admin")
+    if r.status_code == 404:
+        raise UserNotFound(user_id)
+    r.raise_for_status()
+    return r.json().get("is_admin", False)
+
+def fetch_is_admin_many(user_ids):
+    """Interroge le service User pour plusieurs utilisateurs ; les inconnus sont absents du résultat."""
+    with metrics.span("user_call"):
+        r = http.post(f"{config.USER_BASE_URL}/users/is_admin:batch", idempotent=True, json={"ids": user_ids})
+    r.raise_for_status()
+    return r.json()["is_admin"]
+
+admin_cache = AdminCache(
+    fetch_is_admin,
+    ttl=config.CACHE_TTL,
+    max_size=config.ADMIN_CACHE_SIZE,
+    negative_ttl=config.ADMIN_CACHE_NEGATIVE_TTL,
+    refresh_ahead=config.ADMIN_CACHE_REFRESH_AHEAD,
+    fetch_many=fetch_is_admin_many if config.ADMIN_CACHE_BATCH_WINDOW > 0 else None,
+    batch_window=config.ADMIN_CACHE_BATCH_WINDOW,
+    batch_size=config.ADMIN_CACHE_BATCH_SIZE,
+)
+
+# clés de vérification des jetons signés par le service User
+token_keys = parse_keys(config.TOKEN_KEYS)
+
+# cache des films, vidé au fil des modifications signalées par le service Movie
+movie_cache = MovieCache(ttl=config.MOVIE_CACHE_TTL, max_size=config.MOVIE_CACHE_SIZE)
+
+# durées des RPC et de leurs étapes (vérification admin, appels User et Movie), servies sur /metrics
+metrics = Metrics(gauges={
+    "schedule_admin_cache": admin_cache.stats,
+    "schedule_movie_cache": movie_cache.stats,
+})
 
 
 def verify_admin(user_id):
-    now = time.time()
-
-    if user_id in user_admin_cache:
-        cached = user_admin_cache[user_id]
-        if now - cached["timestamp"] < config.CACHE_TTL:
-            return cached["is_admin"], None
-
+    # jeton signé : vérifié localement, sans appel au service User (lève InvalidToken)
+    if is_token(user_id):
+        return verify_token(user_id, token_keys)[1], None
     try:
-        response = requests.get(f"{config.USER_BASE_URL}/users/{user_id}/is_admin")
-        response.raise_for_status()
-        data = response.json()
-        is_admin = data.get("is_admin", False)
-        user_admin_cache[user_id] = {"is_admin": is_admin, "timestamp": now}
-        return is_admin, None
-
+        return admin_cache.get(user_id), None
+    except UserNotFound as e:
+        raise RuntimeError(f"Unable to verify user (404): {e}")
     except requests.exceptions.HTTPError as e:
-        raise RuntimeError(f"Unable to verify user ({response.status_code}): {e}")
+        raise RuntimeError(f"Unable to verify user ({e.response.status_code}): {e}")
     except requests.exceptions.RequestException as e:
         raise RuntimeError(f"User service unreachable: {e}")
 
 
-def write(schedule_data):
-    with open("./databases/times.json", "w") as file:
-        json.dump({"schedule": schedule_data}, file)
-
+class AsyncAdminLoader:
+    """
+    Vérification des utilisateurs absents d'admin_cache pour le serveur asyncio.
+
+    Comme le `fetch_many` d'AdminCache : les utilisateurs ratés pendant
+    `batch_window` secondes sont vérifiés ensemble, par paquets d'au plus
+    `batch_size`, avec un seul `POST /users/is_admin:batch` (batch_window 0 :
+    un `GET /users/<id>/is_admin` par utilisateur). Un utilisateur déjà en
+    cours de vérification n'est pas redemandé. Les résultats, utilisateurs
+    inconnus compris, remplissent admin_cache.
+    Tout se passe sur la boucle asyncio : aucun verrou, aucun thread.
+    """
 
-def fetch_movie_data(user_id, movie_id, context):
-    """Récupère un film depuis le microservice GraphQL"""
-    query = f"""
-    {{
-        movie_with_id(user_id: "{user_id}", id: "{movie_id}") {{
-            id
-            title
-            director
-            rating
-        }}
-    }}
+    def __init__(self, http_client, batch_window, batch_size):
+        self.http = http_client
+        self.batch_window = batch_window
+        self.batch_size = batch_size
+        self._flights = {}   # user_id -> future (en attente ou en cours)
+        self._batch = {}     # user_id -> future du prochain appel groupé
+
+    async def load(self, user_id):
+        """
+        Returns:
+            bool: True si l'utilisateur est admin.
+
+        Raises:
+            RuntimeError: utilisateur inconnu ou service User en erreur.
+        """
+        future = self._flights.get(user_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._flights[user_id] = loop.create_future()
+            if self.batch_window <= 0:
+                asyncio.ensure_future(self._load({user_id: future}))
+            else:
+                self._batch[user_id] = future
+                if len(self._batch) == 1:
+                    # premier de la fenêtre : l'appel partira à la fin de la fenêtre
+                    loop.call_later(self.batch_window, self._flush)
+                elif len(self._batch) >= self.batch_size:
+                    self._flush()
+        # shield : un RPC annulé n'annule pas l'appel attendu par les autres
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        batch, self._batch = self._batch, {}
+        if batch:
+            asyncio.ensure_future(self._load(batch))
+
+    async def _load(self, batch):
+        found, error = {}, None
+        try:
+            if self.batch_window <= 0:
+                user_id, = batch
+                with metrics.span("user_call"):
+                    r = await self.http.get(f"{config.USER_BASE_URL}/users/{user_id}/is_admin")
+                if r.status_code != 404:
+                    r.raise_for_status()
+                    found = {user_id: r.json().get("is_admin", False)}
+            else:
+                with metrics.span("user_call"):
+                    r = await self.http.post(
+                        f"{config.USER_BASE_URL}/users/is_admin:batch", idempotent=True, json={"ids": list(batch)}
+                    )
+                r.raise_for_status()
+                found = r.json()["is_admin"]
+        except httpx.HTTPStatusError as e:
+            error = RuntimeError(f"Unable to verify user ({e.response.status_code}): {e}")
+        except httpx.TransportError as e:
+            error = RuntimeError(f"User service unreachable: {e}")
+        except (ValueError, KeyError, TypeError) as e:
+            error = RuntimeError(f"Invalid User service response: {e}")
+
+        for user_id, future in batch.items():
+            del self._flights[user_id]
+            if error is not None:
+                future.set_exception(error)
+            elif user_id in found:
+                admin_cache.put(user_id, found[user_id])
+                future.set_result(bool(found[user_id]))
+            else:
+                not_found = UserNotFound(user_id)
+                admin_cache.put(user_id, not_found)
+                future.set_exception(RuntimeError(f"Unable to verify user (404): {not_found}"))
+
+
+async def verify_admin_async(admin_loader, user_id):
+    """
+    verify_admin pour le serveur asyncio. Un jeton ou un utilisateur en cache
+    est vérifié sans quitter la boucle ; sinon le service User est appelé
+    par `admin_loader` (AsyncAdminLoader), avec le client asynchrone.
     """
+    if is_token(user_id):
+        return verify_token(user_id, token_keys)[1]
     try:
-        response = requests.post(f"{config.MOVIE_BASE_URL}/graphql", json={"query": query})
-        response.raise_for_status()
-        data = response.json()
-        movie_details = data.get("data", {}).get("movie_with_id")
+        is_admin = admin_cache.get(user_id, cached_only=True)
+    except UserNotFound as e:
+        raise RuntimeError(f"Unable to verify user (404): {e}")
+    if is_admin is not None:
+        return is_admin
+    return await admin_loader.load(user_id)
+
+
+MOVIES_BY_IDS_QUERY = """
+query($user_id: String!, $ids: [String!]!) {
+    movies_by_ids(user_id: $user_id, ids: $ids) {
+        id
+        title
+        director
+        rating
+    }
+}
+"""
+
+# requête persistée (APQ) : on n'envoie que le hash tant que Movie la connaît
+MOVIES_BY_IDS_EXTENSIONS = {
+    "persistedQuery": {"version": 1, "sha256Hash": query_hash(MOVIES_BY_IDS_QUERY)}
+}
+
 
-        if not movie_details:
-            context.abort(grpc.StatusCode.NOT_FOUND, f"Movie not found for id {movie_id}")
+def is_persisted_query_not_found(data):
+    return any(
+        (error.get("extensions") or {}).get("code") == "PERSISTED_QUERY_NOT_FOUND"
+        for error in data.get("errors") or []
+    )
 
-        return schedule_pb2.MovieData(
+
+def request_movies(user_id, movie_ids):
+    """
+    Récupère plusieurs films en une seule requête `movies_by_ids` au microservice GraphQL.
+    Retourne un dict { movie_id: MovieData ou None si le film n'existe pas }.
+    """
+    payload = {
+        "variables": {"user_id": user_id, "ids": movie_ids},
+        "extensions": MOVIES_BY_IDS_EXTENSIONS,
+    }
+    with metrics.span("movie_call"):
+        response = http.post(f"{config.MOVIE_BASE_URL}/graphql", idempotent=True, json=payload)
+        if is_persisted_query_not_found(response.json()):
+            response = http.post(
+                f"{config.MOVIE_BASE_URL}/graphql", idempotent=True, json=dict(payload, query=MOVIES_BY_IDS_QUERY)
+            )
+    response.raise_for_status()
+    return parse_movies(movie_ids, response.json())
+
+
+def parse_movies(movie_ids, data):
+    """Convertit la réponse `movies_by_ids` en { movie_id: MovieData ou None }."""
+    movies_details = (data.get("data") or {}).get("movies_by_ids") or []
+    if len(movies_details) != len(movie_ids):
+        raise ValueError("Invalid movie service response")
+
+    return {
+        movie_id: schedule_pb2.MovieData(
             id=movie_details["id"],
             title=movie_details["title"],
             director=movie_details["director"],
             rating=movie_details["rating"]
-        )
+        ) if movie_details else None
+        for movie_id, movie_details in zip(movie_ids, movies_details)
+    }
 
-    except requests.exceptions.RequestException as e:
+
+class MovieNotFound(LookupError):
+    """Un film du programme n'existe pas dans le service Movie."""
+
+
+def load_movies(user_id, movie_ids):
+    """
+    Récupère plusieurs films, depuis le cache ou en un seul appel au microservice Movie.
+
+    Raises:
+        MovieNotFound: si un des films n'existe pas.
+        requests.exceptions.RequestException, ValueError: service Movie injoignable ou réponse invalide.
+    """
+    movie_ids = list(movie_ids)
+    if not movie_ids:
+        return []
+    with metrics.span("fetch_movies"):
+        found = movie_cache.get_many(movie_ids, lambda ids: request_movies(user_id, ids))
+    return ordered_movies(movie_ids, found)
+
+
+def ordered_movies(movie_ids, found):
+    movies = []
+    for movie_id in movie_ids:
+        if movie_id not in found:
+            raise MovieNotFound(movie_id)
+        movies.append(found[movie_id])
+    return movies
+
+
+def fetch_movies_data(user_id, movie_ids, context):
+    """load_movies, avec les erreurs converties en statut gRPC"""
+    try:
+        return load_movies(user_id, movie_ids)
+    except MovieNotFound as e:
+        context.abort(grpc.StatusCode.NOT_FOUND, f"Movie not found for id {e}")
+    except (requests.exceptions.RequestException, ValueError) as e:
         context.abort(grpc.StatusCode.UNAVAILABLE, f"Movie service unreachable: {e}")
 
 
+def missing_movies(user_id, movie_ids):
+    """Retourne les IDs inconnus du service Movie (cache, puis un seul appel pour le reste)."""
+    found = movie_cache.get_many(movie_ids, lambda ids: request_movies(user_id, ids))
+    return [movie_id for movie_id in movie_ids if movie_id not in found]
+
+
+class ImportBatch:
+    """
+    Entrées d'un ImportSchedule en cours de réception. Les IDs de films sont
+    dédupliqués sur tout le flux, et vérifiés par paquets de
+    SCHEDULE_IMPORT_BATCH dès qu'un paquet est plein, pendant que le client
+    continue d'envoyer.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.missing = []
+        self._seen = set()
+        self._pending = []
+
+    def add(self, request):
+        """Ajoute une entrée. Retourne un paquet d'IDs à vérifier quand il est plein, sinon None."""
+        self.entries.append((request.date, list(request.moviesId)))
+        for movie_id in request.moviesId:
+            if movie_id not in self._seen:
+                self._seen.add(movie_id)
+                self._pending.append(movie_id)
+        if len(self._pending) >= config.SCHEDULE_IMPORT_BATCH:
+            return self.flush()
+        return None
+
+    def flush(self):
+        pending, self._pending = self._pending, []
+        return pending
+
+    def summary(self, counts):
+        return schedule_pb2.ImportScheduleSummary(
+            entries=len(self.entries),
+            datesCreated=counts["dates_created"],
+            datesUpdated=counts["dates_updated"],
+            moviesAdded=counts["movies_added"],
+            moviesSkipped=counts["movies_skipped"],
+        )
+
+
+def movie_ids_only(movie_ids):
+    """MovieData réduits à leur id, pour les requêtes `idsOnly` (aucun appel au service Movie)"""
+    return [schedule_pb2.MovieData(id=movie_id) for movie_id in movie_ids]
+
+
+# threads qui préparent les dates suivantes d'un flux pendant l'envoi de la date courante
+hydrate_pool = futures.ThreadPoolExecutor(max_workers=config.SCHEDULE_HYDRATE_WORKERS)
+
+
+def hydrate_ahead(user_id, schedules, context, depth):
+    """
+    Associe à chaque programme ses films, dans l'ordre, en préparant jusqu'à
+    `depth` dates d'avance dans hydrate_pool pendant que le client lit la
+    date courante. Au plus `depth` dates sont en mémoire en plus de celle
+    envoyée. Si le flux s'arrête (client parti, erreur), les préparations
+    pas encore commencées sont annulées.
+
+    Yields:
+        tuple: (programme, liste de MovieData)
+    """
+    schedules = iter(schedules)
+    pending = deque()
+
+    def submit():
+        schedule = next(schedules, None)
+        if schedule is not None:
+            # copie du contexte : les mesures du thread restent rattachées au RPC
+            pending.append((schedule, hydrate_pool.submit(
+                contextvars.copy_context().run, load_movies, user_id, schedule["movies"]
+            )))
+
+    try:
+        for _ in range(depth + 1):
+            submit()
+        while pending:
+            schedule, future = pending.popleft()
+            submit()
+            try:
+                movies = future.result()
+            except MovieNotFound as e:
+                context.abort(grpc.StatusCode.NOT_FOUND, f"Movie not found for id {e}")
+            except (requests.exceptions.RequestException, ValueError) as e:
+                context.abort(grpc.StatusCode.UNAVAILABLE, f"Movie service unreachable: {e}")
+            yield schedule, movies
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+
+MOVIE_CHANGES_QUERY = """
+query($user_id: String!, $since: Int!, $epoch: String) {
+    movie_changes(user_id: $user_id, since: $since, epoch: $epoch) {
+        epoch
+        version
+        ids
+        reset
+    }
+}
+"""
+
+
+def watch_movie_changes(cache, interval):
+    """
+    Interroge périodiquement le flux de modifications du service Movie et
+    retire du cache les films modifiés (tout le cache si le flux ne peut
+    pas être suivi : Movie redémarré ou trop de modifications manquées).
+    """
+    epoch, version, failing = None, 0, False
+    while True:
+        try:
+            response = http.post(f"{config.MOVIE_BASE_URL}/graphql", idempotent=True, json={
+                "query": MOVIE_CHANGES_QUERY,
+                "variables": {"user_id": config.SERVICE_USER_ID, "since": version, "epoch": epoch},
+            })
+            response.raise_for_status()
+            changes = response.json()["data"]["movie_changes"]
+            if changes["reset"]:
+                cache.clear()
+            elif changes["ids"]:
+                cache.invalidate(changes["ids"])
+            epoch, version = changes["epoch"], changes["version"]
+            if failing:
+                logger.info("movie_changes polling recovered")
+                failing = False
+        except (requests.exceptions.RequestException, ValueError, KeyError, TypeError) as e:
+            # Movie injoignable : les entrées expirent quand même au bout de MOVIE_CACHE_TTL ;
+            # on ne signale que le passage en échec, pas chaque tentative
+            if not failing:
+                logger.warning("movie_changes polling failed, retrying every %ss: %s", interval, e)
+                failing = True
+        time.sleep(interval)
+
+
+def encode_resume_token(date):
+    """Jeton de reprise de GetScheduleRange : la dernière date envoyée, opaque pour le client."""
+    return base64.urlsafe_b64encode(date.encode()).decode()
+
+
+def decode_resume_token(token):
+    try:
+        date = base64.b64decode(token.encode(), altchars=b"-_", validate=True).decode()
+    except (binascii.Error, UnicodeDecodeError):
+        date = None
+    if not date:
+        raise ValueError(f"Invalid resume token: {token}")
+    return date
+
+
 class ScheduleServicer(schedule_pb2_grpc.ScheduleServicer):
 
     def __init__(self):
-        with open("./databases/times.json", "r") as js_file:
-            self.db = json.load(js_file)["schedule"]
+        # stockage choisi dans config.py (STORAGE_BACKEND) : JSON + journal, ou SQLite
+        self.store = open_store(
+            config.STORAGE_BACKEND, "./databases/times.json", "schedule", key="date",
+            indexes=SCHEDULE_INDEXES, compact_every=config.STORAGE_COMPACT_EVERY
+        )
+        # index date -> films, film -> dates et dates triées
+        self.index = ScheduleIndex(self.store)
 
     def _check_admin(self, user_id, context, require_admin=False):
         try:
-            is_admin, _ = verify_admin(user_id)
+            with metrics.span("verify_admin"):
+                is_admin, _ = verify_admin(user_id)
+        except InvalidToken as e:
+            context.abort(grpc.StatusCode.UNAUTHENTICATED, f"Invalid token: {e}")
         except Exception as e:
             context.abort(grpc.StatusCode.UNAVAILABLE, str(e))
         if require_admin and not is_admin:
@@ -86,49 +472,122 @@ class ScheduleServicer(schedule_pb2_grpc.ScheduleServicer):
 
     def GetJson(self, request, context):
         self._check_admin(request.userId, context)
-        for schedule in self.db:
-            movies = [
-                fetch_movie_data(request.userId, movie_id, context)
-                for movie_id in schedule["movies"]
-            ]
+        for schedule, movies in hydrate_ahead(request.userId, self.index.all(), context, config.SCHEDULE_READ_AHEAD):
             yield schedule_pb2.ScheduleData(date=schedule["date"], movies=movies)
 
     def GetMoviesByDate(self, request, context):
         self._check_admin(request.userId, context)
-        for schedule in self.db:
-            if str(schedule["date"]) == str(request.date):
-                movies = [
-                    fetch_movie_data(request.userId, movie_id, context)
-                    for movie_id in schedule["movies"]
-                ]
-                return schedule_pb2.ScheduleData(date=schedule["date"], movies=movies)
+        schedule = self.index.get(request.date)
+        if schedule is not None:
+            if request.idsOnly:
+                movies = movie_ids_only(schedule["movies"])
+            else:
+                movies = fetch_movies_data(request.userId, schedule["movies"], context)
+            return schedule_pb2.ScheduleData(date=schedule["date"], movies=movies)
         context.abort(grpc.StatusCode.NOT_FOUND, "No movies found for this date")
 
+    def IsScheduled(self, request, context):
+        self._check_admin(request.userId, context)
+        if not request.date or not request.movieId:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "date and movieId required")
+        return schedule_pb2.IsScheduledResponse(scheduled=self.index.is_scheduled(request.date, request.movieId))
+
     def GetScheduleByMovie(self, request, context):
         self._check_admin(request.userId, context)
         movie_id = request.movieId
         if not movie_id:
             context.abort(grpc.StatusCode.INVALID_ARGUMENT, "movieId not provided")
-        dates = [schedule["date"] for schedule in self.db if movie_id in schedule["movies"]]
+        dates = self.index.dates_for_movie(movie_id)
         if not dates:
             context.abort(grpc.StatusCode.NOT_FOUND, "No dates found for this movie")
         return schedule_pb2.DateData(dates=dates)
 
+    def GetScheduleRange(self, request, context):
+        """
+        Stream the schedules between startDate and endDate in date order.
+
+        The index is read SCHEDULE_RANGE_CHUNK dates at a time, only when
+        the client has consumed the previous messages, and the movies of
+        the next SCHEDULE_READ_AHEAD dates are fetched while the current one
+        is sent, so memory stays bounded whatever the size of the range.
+        Every message carries a resumeToken: a new call with that token
+        continues right after it.
+        """
+        self._check_admin(request.userId, context)
+        start, end = request.startDate or None, request.endDate or None
+        if start and end and start > end:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "startDate must be before endDate")
+        if request.pageSize < 0:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, "pageSize must be positive")
+        after = None
+        if request.resumeToken:
+            try:
+                after = decode_resume_token(request.resumeToken)
+            except ValueError as e:
+                context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+        schedules = self._range_chunks(start, end, request.pageSize or None, after, context.is_active)
+        if request.idsOnly:
+            hydrated = ((schedule, movie_ids_only(schedule["movies"])) for schedule in schedules)
+        else:
+            hydrated = hydrate_ahead(request.userId, schedules, context, config.SCHEDULE_READ_AHEAD)
+        for schedule, movies in hydrated:
+            yield schedule_pb2.ScheduleData(
+                date=schedule["date"], movies=movies, resumeToken=encode_resume_token(schedule["date"])
+            )
+
+    def _range_chunks(self, start, end, remaining, after, is_active=lambda: True):
+        """Lit les programmes de la plage SCHEDULE_RANGE_CHUNK dates à la fois, à la demande."""
+        while is_active() and (remaining is None or remaining > 0):
+            chunk_size = config.SCHEDULE_RANGE_CHUNK if remaining is None else min(remaining, config.SCHEDULE_RANGE_CHUNK)
+            schedules = self.index.range(start, end, chunk_size, after=after)
+            yield from schedules
+            if len(schedules) < chunk_size:
+                return
+            after = schedules[-1]["date"]
+            if remaining is not None:
+                remaining -= len(schedules)
+
     def AddSchedule(self, request, context):
         self._check_admin(request.userId, context, require_admin=True)
-        for schedule in self.db:
-            if str(schedule["date"]) == str(request.date):
-                context.abort(grpc.StatusCode.ALREADY_EXISTS, "Schedule date already exists")
-
-        movies = [
-            fetch_movie_data(request.userId, movie_id, context)
-            for movie_id in request.moviesId
-        ]
-        new_entry = {"date": request.date, "movies": [movie.id for movie in movies]}
-        self.db.append(new_entry)
-        write(self.db)
+        if self.index.get(request.date) is not None:
+            context.abort(grpc.StatusCode.ALREADY_EXISTS, "Schedule date already exists")
+
+        movies = fetch_movies_data(request.userId, request.moviesId, context)
+        try:
+            self.index.add_date(request.date, [movie.id for movie in movies])
+        except KeyError:
+            context.abort(grpc.StatusCode.ALREADY_EXISTS, "Schedule date already exists")
         return schedule_pb2.ScheduleData(date=request.date, movies=movies)
 
+    def ImportSchedule(self, request_iterator, context):
+        """
+        Bulk import: every entry of the stream is applied in a single store
+        write once all movie IDs are validated, or none is.
+        """
+        first = next(request_iterator, None)
+        if first is None:
+            return schedule_pb2.ImportScheduleSummary()
+        self._check_admin(first.userId, context, require_admin=True)
+
+        batch = ImportBatch()
+        try:
+            for request in itertools.chain([first], request_iterator):
+                if not request.date:
+                    context.abort(grpc.StatusCode.INVALID_ARGUMENT, "date required for every entry")
+                movie_ids = batch.add(request)
+                if movie_ids:
+                    batch.missing += missing_movies(first.userId, movie_ids)
+            movie_ids = batch.flush()
+            if movie_ids:
+                batch.missing += missing_movies(first.userId, movie_ids)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            context.abort(grpc.StatusCode.UNAVAILABLE, f"Movie service unreachable: {e}")
+        if batch.missing:
+            context.abort(grpc.StatusCode.NOT_FOUND, f"Movies not found: {batch.missing[:20]}")
+
+        return batch.summary(self.index.import_dates(batch.entries, replace=first.replace))
+
     def AddMovieToDate(self, request, context):
         self._check_admin(request.userId, context, require_admin=True)
 
@@ -136,41 +595,17 @@ class ScheduleServicer(schedule_pb2_grpc.ScheduleServicer):
             context.abort(grpc.StatusCode.INVALID_ARGUMENT, "At least one movieId required")
 
         target_date = str(request.date)
-        added_movies = []
-        existing_date = None
-
-        for schedule in self.db:
-            if str(schedule["date"]) == target_date:
-                existing_date = schedule
-                break
-
-        if existing_date:
-            already_scheduled = [
-                mid for mid in request.moviesId if mid in existing_date["movies"]
-            ]
-            if already_scheduled:
-                context.abort(
-                    grpc.StatusCode.ALREADY_EXISTS,
-                    f"Movies already scheduled for this date: {already_scheduled}"
-                )
-
-            existing_date["movies"].extend(request.moviesId)
-            write(self.db)
+        # vérifie que les films existent avant de modifier le programme
+        fetch_movies_data(request.userId, request.moviesId, context)
 
-            added_movies = [
-                fetch_movie_data(request.userId, mid, context)
-                for mid in existing_date["movies"]
-            ]
-            return schedule_pb2.ScheduleData(date=target_date, movies=added_movies)
+        schedule, already_scheduled = self.index.add_movies(target_date, request.moviesId)
+        if already_scheduled:
+            context.abort(
+                grpc.StatusCode.ALREADY_EXISTS,
+                f"Movies already scheduled for this date: {already_scheduled}"
+            )
 
-        new_entry = {"date": target_date, "movies": list(request.moviesId)}
-        self.db.append(new_entry)
-        write(self.db)
-
-        added_movies = [
-            fetch_movie_data(request.userId, mid, context)
-            for mid in request.moviesId
-        ]
+        added_movies = fetch_movies_data(request.userId, schedule["movies"], context)
         return schedule_pb2.ScheduleData(date=target_date, movies=added_movies)
 
 
@@ -178,12 +613,8 @@ class ScheduleServicer(schedule_pb2_grpc.ScheduleServicer):
         self._check_admin(request.userId, context, require_admin=True)
         target_date = str(request.date)
 
-        new_schedule = [s for s in self.db if str(s["date"]) != target_date]
-        if len(new_schedule) == len(self.db):
+        if self.index.delete_date(target_date) is None:
             context.abort(grpc.StatusCode.NOT_FOUND, "Date not found")
-
-        self.db = new_schedule
-        write(self.db)
         return schedule_pb2.Empty()
 
     def DeleteMovieFromDate(self, request, context):
@@ -193,31 +624,297 @@ class ScheduleServicer(schedule_pb2_grpc.ScheduleServicer):
             context.abort(grpc.StatusCode.INVALID_ARGUMENT, "moviesId list required")
 
         target_date = str(request.date)
-        movies_to_remove = set(request.moviesId)
+        found_movies = self.index.remove_movies(target_date, request.moviesId)
+        if found_movies is None:
+            context.abort(grpc.StatusCode.NOT_FOUND, "Date not found" + request.date)
+        if not found_movies:
+            context.abort(grpc.StatusCode.NOT_FOUND, "None of the movies found in this date")
+        return schedule_pb2.Empty()
+
+
+
+class AsyncScheduleServicer(ScheduleServicer):
+    """
+    Version asyncio du servicer, pour le serveur grpc.aio (SCHEDULE_SERVER=aio).
+
+    Les appels au service Movie ne bloquent pas de thread : des milliers de
+    RPC peuvent être en cours dans un seul processus. Les films des dates
+    suivantes d'un flux sont récupérés pendant l'envoi de la date courante. Les écritures du
+    stockage (fsync) passent dans un thread pour ne pas bloquer la boucle.
+    """
+
+    def __init__(self, http_client):
+        super().__init__()
+        self.http = http_client
+        self.admin_loader = AsyncAdminLoader(
+            http_client, config.ADMIN_CACHE_BATCH_WINDOW, config.ADMIN_CACHE_BATCH_SIZE
+        )
+
+    async def _check_admin_async(self, user_id, context, require_admin=False):
+        try:
+            with metrics.span("verify_admin"):
+                is_admin = await verify_admin_async(self.admin_loader, user_id)
+        except InvalidToken as e:
+            await context.abort(grpc.StatusCode.UNAUTHENTICATED, f"Invalid token: {e}")
+        except Exception as e:
+            await context.abort(grpc.StatusCode.UNAVAILABLE, str(e))
+        if require_admin and not is_admin:
+            await context.abort(grpc.StatusCode.PERMISSION_DENIED, "Admin access required")
+        return is_admin
+
+    async def _request_movies(self, user_id, movie_ids):
+        payload = {
+            "variables": {"user_id": user_id, "ids": movie_ids},
+            "extensions": MOVIES_BY_IDS_EXTENSIONS,
+        }
+        with metrics.span("movie_call"):
+            response = await self.http.post(f"{config.MOVIE_BASE_URL}/graphql", idempotent=True, json=payload)
+            if is_persisted_query_not_found(response.json()):
+                response = await self.http.post(
+                    f"{config.MOVIE_BASE_URL}/graphql", idempotent=True, json=dict(payload, query=MOVIES_BY_IDS_QUERY)
+                )
+        response.raise_for_status()
+        return parse_movies(movie_ids, response.json())
+
+    async def _load_movies(self, user_id, movie_ids):
+        movie_ids = list(movie_ids)
+        if not movie_ids:
+            return []
+        with metrics.span("fetch_movies"):
+            found = await movie_cache.get_many_async(movie_ids, lambda ids: self._request_movies(user_id, ids))
+        return ordered_movies(movie_ids, found)
+
+    async def _fetch_movies_data(self, user_id, movie_ids, context):
+        try:
+            return await self._load_movies(user_id, movie_ids)
+        except MovieNotFound as e:
+            await context.abort(grpc.StatusCode.NOT_FOUND, f"Movie not found for id {e}")
+        except (httpx.HTTPError, ValueError) as e:
+            await context.abort(grpc.StatusCode.UNAVAILABLE, f"Movie service unreachable: {e}")
+
+    async def _hydrate_ahead(self, user_id, schedules, context, depth):
+        """hydrate_ahead pour la boucle asyncio : les `depth` dates suivantes sont des tâches."""
+        schedules = iter(schedules)
+        pending = deque()
+
+        def submit():
+            schedule = next(schedules, None)
+            if schedule is not None:
+                pending.append((schedule, asyncio.create_task(self._load_movies(user_id, schedule["movies"]))))
+
+        try:
+            for _ in range(depth + 1):
+                submit()
+            while pending:
+                schedule, task = pending.popleft()
+                submit()
+                try:
+                    movies = await task
+                except MovieNotFound as e:
+                    await context.abort(grpc.StatusCode.NOT_FOUND, f"Movie not found for id {e}")
+                except (httpx.HTTPError, ValueError) as e:
+                    await context.abort(grpc.StatusCode.UNAVAILABLE, f"Movie service unreachable: {e}")
+                yield schedule, movies
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+    async def GetJson(self, request, context):
+        await self._check_admin_async(request.userId, context)
+        async for schedule, movies in self._hydrate_ahead(
+            request.userId, self.index.all(), context, config.SCHEDULE_READ_AHEAD
+        ):
+            yield schedule_pb2.ScheduleData(date=schedule["date"], movies=movies)
+
+    async def GetMoviesByDate(self, request, context):
+        await self._check_admin_async(request.userId, context)
+        schedule = self.index.get(request.date)
+        if schedule is None:
+            await context.abort(grpc.StatusCode.NOT_FOUND, "No movies found for this date")
+        if request.idsOnly:
+            movies = movie_ids_only(schedule["movies"])
+        else:
+            movies = await self._fetch_movies_data(request.userId, schedule["movies"], context)
+        return schedule_pb2.ScheduleData(date=schedule["date"], movies=movies)
+
+    async def IsScheduled(self, request, context):
+        await self._check_admin_async(request.userId, context)
+        if not request.date or not request.movieId:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "date and movieId required")
+        return schedule_pb2.IsScheduledResponse(scheduled=self.index.is_scheduled(request.date, request.movieId))
+
+    async def GetScheduleByMovie(self, request, context):
+        await self._check_admin_async(request.userId, context)
+        movie_id = request.movieId
+        if not movie_id:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "movieId not provided")
+        dates = self.index.dates_for_movie(movie_id)
+        if not dates:
+            await context.abort(grpc.StatusCode.NOT_FOUND, "No dates found for this movie")
+        return schedule_pb2.DateData(dates=dates)
+
+    async def GetScheduleRange(self, request, context):
+        await self._check_admin_async(request.userId, context)
+        start, end = request.startDate or None, request.endDate or None
+        if start and end and start > end:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "startDate must be before endDate")
+        if request.pageSize < 0:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "pageSize must be positive")
+        after = None
+        if request.resumeToken:
+            try:
+                after = decode_resume_token(request.resumeToken)
+            except ValueError as e:
+                await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+        schedules = self._range_chunks(start, end, request.pageSize or None, after)
+        if request.idsOnly:
+            for schedule in schedules:
+                yield schedule_pb2.ScheduleData(
+                    date=schedule["date"], movies=movie_ids_only(schedule["movies"]),
+                    resumeToken=encode_resume_token(schedule["date"])
+                )
+            return
+        async for schedule, movies in self._hydrate_ahead(request.userId, schedules, context, config.SCHEDULE_READ_AHEAD):
+            yield schedule_pb2.ScheduleData(
+                date=schedule["date"], movies=movies, resumeToken=encode_resume_token(schedule["date"])
+            )
+
+    async def AddSchedule(self, request, context):
+        await self._check_admin_async(request.userId, context, require_admin=True)
+        if self.index.get(request.date) is not None:
+            await context.abort(grpc.StatusCode.ALREADY_EXISTS, "Schedule date already exists")
+
+        movies = await self._fetch_movies_data(request.userId, request.moviesId, context)
+        try:
+            await asyncio.to_thread(self.index.add_date, request.date, [movie.id for movie in movies])
+        except KeyError:
+            await context.abort(grpc.StatusCode.ALREADY_EXISTS, "Schedule date already exists")
+        return schedule_pb2.ScheduleData(date=request.date, movies=movies)
+
+    async def _missing_movies(self, user_id, movie_ids):
+        found = await movie_cache.get_many_async(movie_ids, lambda ids: self._request_movies(user_id, ids))
+        return [movie_id for movie_id in movie_ids if movie_id not in found]
+
+    async def ImportSchedule(self, request_iterator, context):
+        batch, first = ImportBatch(), None
+        try:
+            async for request in request_iterator:
+                if first is None:
+                    first = request
+                    await self._check_admin_async(first.userId, context, require_admin=True)
+                if not request.date:
+                    await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "date required for every entry")
+                movie_ids = batch.add(request)
+                if movie_ids:
+                    batch.missing += await self._missing_movies(first.userId, movie_ids)
+            if first is None:
+                return schedule_pb2.ImportScheduleSummary()
+            movie_ids = batch.flush()
+            if movie_ids:
+                batch.missing += await self._missing_movies(first.userId, movie_ids)
+        except (httpx.HTTPError, ValueError) as e:
+            await context.abort(grpc.StatusCode.UNAVAILABLE, f"Movie service unreachable: {e}")
+        if batch.missing:
+            await context.abort(grpc.StatusCode.NOT_FOUND, f"Movies not found: {batch.missing[:20]}")
+
+        counts = await asyncio.to_thread(self.index.import_dates, batch.entries, first.replace)
+        return batch.summary(counts)
+
+    async def AddMovieToDate(self, request, context):
+        await self._check_admin_async(request.userId, context, require_admin=True)
+
+        if not request.moviesId:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "At least one movieId required")
+
+        target_date = str(request.date)
+        # vérifie que les films existent avant de modifier le programme
+        await self._fetch_movies_data(request.userId, request.moviesId, context)
+
+        schedule, already_scheduled = await asyncio.to_thread(self.index.add_movies, target_date, list(request.moviesId))
+        if already_scheduled:
+            await context.abort(
+                grpc.StatusCode.ALREADY_EXISTS,
+                f"Movies already scheduled for this date: {already_scheduled}"
+            )
+
+        added_movies = await self._fetch_movies_data(request.userId, schedule["movies"], context)
+        return schedule_pb2.ScheduleData(date=target_date, movies=added_movies)
 
-        for schedule in self.db:
-            if str(schedule["date"]) == target_date:
-                existing_movies = set(schedule["movies"])
-                found_movies = movies_to_remove & existing_movies
+    async def DeleteDate(self, request, context):
+        await self._check_admin_async(request.userId, context, require_admin=True)
+        if await asyncio.to_thread(self.index.delete_date, str(request.date)) is None:
+            await context.abort(grpc.StatusCode.NOT_FOUND, "Date not found")
+        return schedule_pb2.Empty()
 
-                if not found_movies:
-                    context.abort(grpc.StatusCode.NOT_FOUND, "None of the movies found in this date")
+    async def DeleteMovieFromDate(self, request, context):
+        await self._check_admin_async(request.userId, context, require_admin=True)
 
-                schedule["movies"] = list(existing_movies - found_movies)
-                write(self.db)
-                return schedule_pb2.Empty()
+        if not request.moviesId:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, "moviesId list required")
 
-        context.abort(grpc.StatusCode.NOT_FOUND, "Date not found" + request.date)
+        found_movies = await asyncio.to_thread(self.index.remove_movies, str(request.date), list(request.moviesId))
+        if found_movies is None:
+            await context.abort(grpc.StatusCode.NOT_FOUND, "Date not found" + request.date)
+        if not found_movies:
+            await context.abort(grpc.StatusCode.NOT_FOUND, "None of the movies found in this date")
+        return schedule_pb2.Empty()
 
 
+def start_movie_watcher():
+    threading.Thread(
+        target=watch_movie_changes, args=(movie_cache, config.MOVIE_CACHE_POLL_INTERVAL), daemon=True
+    ).start()
+
+
+def start_metrics_endpoint():
+    if config.SCHEDULE_METRICS_PORT:
+        serve_metrics(metrics, config.SCHEDULE_METRICS_HOST, config.SCHEDULE_METRICS_PORT)
+
 
 def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=config.SCHEDULE_WORKERS),
+        interceptors=[MetricsInterceptor(metrics)],
+    )
     schedule_pb2_grpc.add_ScheduleServicer_to_server(ScheduleServicer(), server)
     server.add_insecure_port("[::]:3202")
     server.start()
+    start_movie_watcher()
+    start_metrics_endpoint()
     server.wait_for_termination()
 
 
+async def serve_aio():
+    # threads des écritures du stockage, des vérifications admin non cachées et du DNS
+    asyncio.get_running_loop().set_default_executor(futures.ThreadPoolExecutor(max_workers=config.SCHEDULE_WORKERS))
+    http_client = AsyncHttpClient(
+        connect_timeout=config.HTTP_CONNECT_TIMEOUT,
+        read_timeout=config.HTTP_READ_TIMEOUT,
+        retries=config.HTTP_RETRIES,
+        backoff=config.HTTP_RETRY_BACKOFF,
+        pool_size=config.HTTP_POOL_SIZE,
+    )
+    server = grpc.aio.server(
+        interceptors=[AsyncMetricsInterceptor(metrics)],
+        maximum_concurrent_rpcs=config.SCHEDULE_MAX_CONCURRENT_RPCS or None,
+    )
+    schedule_pb2_grpc.add_ScheduleServicer_to_server(AsyncScheduleServicer(http_client), server)
+    server.add_insecure_port("[::]:3202")
+    await server.start()
+    start_movie_watcher()
+    start_metrics_endpoint()
+    try:
+        await server.wait_for_termination()
+    finally:
+        await http_client.aclose()
+
+
 if __name__ == "__main__":
-    serve()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    # httpx journalise chaque requête au niveau INFO
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    if config.SCHEDULE_SERVER == "aio":
+        asyncio.run(serve_aio())
+    else:
+        serve()
@@ -0,0 +1,191 @@
+import threading
+import zlib
+
+# index secondaire déclaré au stockage : film -> dates où il est programmé
+SCHEDULE_INDEXES = {
+    "movie": lambda schedule: schedule["movies"],
+}
+
+
+class ScheduleIndex:
+    """
+    Programme des séances au-dessus d'un backend de stockage.
+
+    - index primaire : la clé du stockage est la date, une date se lit donc
+      directement (`movies`) et l'appartenance d'un film se teste sur un set ;
+    - index inverse : film -> dates, déclaré au stockage (SCHEDULE_INDEXES) ;
+    - dates triées : le stockage parcourt les clés dans l'ordre, ce qui
+      permet de lire une plage de dates (`range`).
+    Toutes les mutations passent par cette classe, les index restent donc
+    cohérents avec le programme enregistré.
+
+    Concurrence : les lectures ne prennent aucun verrou. Un programme
+    enregistré n'est jamais modifié en place (copie à l'écriture) : une
+    mutation construit un nouveau dict et le remplace dans le stockage, un
+    lecteur voit donc l'ancienne ou la nouvelle version, jamais un état
+    intermédiaire. Les mutations d'une même date sont sérialisées par un
+    verrou tiré d'un tableau fixe (`lock_stripes` verrous, choisis par
+    hachage de la date) ; deux dates différentes s'écrivent en parallèle.
+    """
+
+    def __init__(self, store, lock_stripes=64):
+        self.store = store
+        self._locks = [threading.Lock() for _ in range(lock_stripes)]
+
+    def __len__(self):
+        return len(self.store)
+
+    def all(self):
+        """
+        Returns:
+            list: every schedule ({date, movies}), in insertion order.
+        """
+        return self.store.records()
+
+    def get(self, date):
+        return self.store.get(date)
+
+    def movies(self, date):
+        """
+        Returns:
+            set: IDs of the movies scheduled on `date`, or None if the date is unknown.
+        """
+        schedule = self.store.get(date)
+        return None if schedule is None else set(schedule["movies"])
+
+    def is_scheduled(self, date, movie_id):
+        """Lookup in the film -> dates index, without reading the schedule of that date."""
+        return self.store.contains("movie", movie_id, date)
+
+    def dates_for_movie(self, movie_id):
+        """
+        Returns:
+            list: dates where the movie is scheduled, in ascending order.
+        """
+        return sorted(schedule["date"] for schedule in self.store.find("movie", movie_id))
+
+    def range(self, start=None, end=None, limit=None, after=None):
+        """
+        Returns:
+            list: schedules whose date is between `start` and `end` (inclusive)
+            and strictly after `after`, in date order.
+        """
+        if after is None or (start is not None and after < start):
+            return self.store.range(start, end, limit)
+        schedules = self.store.range(after, end, None if limit is None else limit + 1)
+        if schedules and schedules[0]["date"] == after:
+            schedules = schedules[1:]
+        return schedules if limit is None else schedules[:limit]
+
+    def _lock(self, date):
+        return self._locks[zlib.crc32(str(date).encode()) % len(self._locks)]
+
+    def add_date(self, date, movie_ids):
+        """
+        Raises:
+            KeyError: if the date already exists.
+        """
+        schedule = {"date": date, "movies": list(dict.fromkeys(movie_ids))}
+        with self._lock(date):
+            if self.store.get(date) is not None:
+                raise KeyError(date)
+            self.store.put(schedule)
+        return schedule
+
+    def add_movies(self, date, movie_ids):
+        """
+        Add movies to a date, creating the date if needed.
+
+        Returns:
+            tuple: (the updated schedule, IDs that were already scheduled on
+            that date). Nothing is written if some were already scheduled.
+        """
+        with self._lock(date):
+            schedule = self.store.get(date)
+            if schedule is None:
+                schedule = {"date": date, "movies": []}
+            scheduled = set(schedule["movies"])
+            already_scheduled = [movie_id for movie_id in movie_ids if movie_id in scheduled]
+            if already_scheduled:
+                return schedule, already_scheduled
+            schedule = {"date": date, "movies": schedule["movies"] + list(dict.fromkeys(movie_ids))}
+            self.store.put(schedule)
+        return schedule, []
+
+    def import_dates(self, entries, replace=False):
+        """
+        Apply many (date, movie IDs) entries at once, in a single store write.
+
+        Movies are added to each date (created if needed), skipping those
+        already scheduled; with `replace`, each imported date is overwritten
+        with the imported movies instead. Several entries for the same date
+        are merged in order.
+
+        Returns:
+            dict: counts of dates_created, dates_updated, movies_added and
+            movies_skipped.
+        """
+        imported = {}
+        for date, movie_ids in entries:
+            imported.setdefault(date, []).extend(movie_ids)
+
+        summary = {"dates_created": 0, "dates_updated": 0, "movies_added": 0, "movies_skipped": 0}
+        # verrous de toutes les dates importées, toujours pris dans le même ordre
+        locks = sorted({id(lock): lock for lock in map(self._lock, imported)}.items())
+        for _, lock in locks:
+            lock.acquire()
+        try:
+            changed = []
+            for date, movie_ids in imported.items():
+                current = self.store.get(date)
+                previous = set() if current is None else set(current["movies"])
+                movies = [] if current is None or replace else list(current["movies"])
+                scheduled = set(movies)
+                for movie_id in movie_ids:
+                    if movie_id in scheduled:
+                        summary["movies_skipped"] += 1
+                        continue
+                    scheduled.add(movie_id)
+                    movies.append(movie_id)
+                    summary["movies_skipped" if movie_id in previous else "movies_added"] += 1
+                if current is None:
+                    summary["dates_created"] += 1
+                elif movies != current["movies"]:
+                    summary["dates_updated"] += 1
+                else:
+                    continue
+                changed.append({"date": date, "movies": movies})
+            if changed:
+                self.store.put_many(changed)
+        finally:
+            for _, lock in reversed(locks):
+                lock.release()
+        return summary
+
+    def delete_date(self, date):
+        """
+        Returns:
+            dict: the removed schedule, or None if the date is unknown.
+        """
+        with self._lock(date):
+            schedule = self.store.get(date)
+            if schedule is not None:
+                self.store.delete(date)
+        return schedule
+
+    def remove_movies(self, date, movie_ids):
+        """
+        Returns:
+            set: IDs actually removed from the date, or None if the date is unknown.
+        """
+        with self._lock(date):
+            schedule = self.store.get(date)
+            if schedule is None:
+                return None
+            found = set(movie_ids) & set(schedule["movies"])
+            if found:
+                self.store.put({
+                    "date": date,
+                    "movies": [movie_id for movie_id in schedule["movies"] if movie_id not in found],
+                })
+        return found
@@ -20,4 +20,29 @@ USER_HOST = 'user' if USE_DOCKER else 'localhost'
 USER_PORT = int(os.getenv('USER_PORT', 3201))
 USER_BASE_URL = f"http://{USER_HOST}:{USER_PORT}"
 
-CACHE_TTL = int(os.getenv('CACHE_TTL', 60))  # Time-to-live en secondes
\ No newline at end of file
+CACHE_TTL = int(os.getenv('CACHE_TTL', 60))  # Time-to-live en secondes
+ADMIN_CACHE_SIZE = int(os.getenv('ADMIN_CACHE_SIZE', 10000))  # nombre max d'utilisateurs en cache
+ADMIN_CACHE_NEGATIVE_TTL = int(os.getenv('ADMIN_CACHE_NEGATIVE_TTL', 10))  # TTL des utilisateurs inconnus
+ADMIN_CACHE_REFRESH_AHEAD = float(os.getenv('ADMIN_CACHE_REFRESH_AHEAD', 0.8))  # fraction du TTL avant rechargement
+ADMIN_CACHE_BATCH_WINDOW = float(os.getenv('ADMIN_CACHE_BATCH_WINDOW', 0.005))  # secondes pour regrouper les vérifications (0 = une requête par utilisateur)
+ADMIN_CACHE_BATCH_SIZE = int(os.getenv('ADMIN_CACHE_BATCH_SIZE', 100))  # utilisateurs max par requête groupée
+USER_BATCH_MAX = int(os.getenv('USER_BATCH_MAX', 1000))  # IDs max acceptés par /users/is_admin:batch et /<user_id>/users/profiles:batch
+
+# Appels HTTP entre services : délais (secondes), tentatives des lectures et taille du pool par hôte
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 1.0))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 5.0))
+HTTP_RETRIES = int(os.getenv('HTTP_RETRIES', 2))
+HTTP_RETRY_BACKOFF = float(os.getenv('HTTP_RETRY_BACKOFF', 0.05))
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 20))
+
+# Jetons signés (HMAC) acceptés à la place de user_id : clés "kid:secret" séparées par des virgules.
+# Toutes les clés listées sont acceptées, ce qui permet de les faire tourner sans interruption.
+TOKEN_KEYS = os.getenv('TOKEN_KEYS', '')
+TOKEN_ACTIVE_KID = os.getenv('TOKEN_ACTIVE_KID', '')  # clé qui signe les nouveaux jetons (par défaut la première)
+TOKEN_TTL = int(os.getenv('TOKEN_TTL', 300))  # durée de validité d'un jeton en secondes
+
+# Stockage : backend "json" (instantané + journal, tout en mémoire) ou "sqlite" (base embarquée)
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'json')
+
+# Stockage : nombre de mutations journalisées avant l'écriture d'un nouvel instantané
+STORAGE_COMPACT_EVERY = int(os.getenv('STORAGE_COMPACT_EVERY', 1000))
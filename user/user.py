@@ -1,25 +1,79 @@
+import os, sys
+# paquet partagé common/ : copié dans /app par le Dockerfile, dans le dossier parent en local
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from flask import Flask, render_template, request, jsonify, make_response
-import json, time
+import unicodedata
 import requests
 from flask_cors import CORS
 import config
+from common.storage import open_store
+from common.admin_cache import AdminCache, UserNotFound
+from common.http_client import HttpClient
+from common.tokens import InvalidToken, is_token, issue_token, parse_keys, verify_token
 
 app = Flask(__name__)
 
 CORS(app)
 
-# cache local pour stocker si un user est admin
-# format : { "user_id": {"is_admin": True/False, "timestamp": 123456789} }
-user_admin_cache = {}
-
-# charge le fichier JSON contenant les utilisateurs
-with open('./databases/users.json', "r") as jsf:
-    users = json.load(jsf)["users"]
-
-# sauvegarde les utilisateurs dans le fichier
-def write(users):
-    with open('./databases/users.json', 'w') as f:
-        json.dump({"users": users}, f)
+def normalize_name(name):
+    """
+    Normalize a user name for lookups: accents stripped, case folded and
+    whitespace collapsed ("  Chris  RIVERS " -> "chris rivers").
+    """
+    decomposed = unicodedata.normalize("NFKD", str(name))
+    return " ".join("".join(c for c in decomposed if not unicodedata.combining(c)).casefold().split())
+
+# index secondaires déclarés au stockage : nom normalisé -> utilisateurs
+USER_INDEXES = {
+    "name": lambda user: [normalize_name(user.get("name", ""))],
+}
+
+# charge les utilisateurs : stockage choisi dans config.py (STORAGE_BACKEND), JSON + journal ou SQLite
+# la clé (id) donne un accès direct à un utilisateur, l'index "name" une recherche par nom sans parcours
+store = open_store(
+    config.STORAGE_BACKEND, './databases/users.json', 'users', key='id',
+    indexes=USER_INDEXES, compact_every=config.STORAGE_COMPACT_EVERY
+)
+
+# client HTTP partagé : connexions keep-alive par hôte, délais et nouvelles tentatives
+http = HttpClient(
+    connect_timeout=config.HTTP_CONNECT_TIMEOUT,
+    read_timeout=config.HTTP_READ_TIMEOUT,
+    retries=config.HTTP_RETRIES,
+    backoff=config.HTTP_RETRY_BACKOFF,
+    pool_size=config.HTTP_POOL_SIZE,
+)
+
+# cache partagé du statut admin (LRU + TTL, un seul appel par utilisateur)
+def fetch_is_admin(user_id):
+    """Interroge le service User ; lève UserNotFound si l'utilisateur n'existe pas."""
+    r = http.get(f"{config.USER_BASE_URL}/users/{user_id}/is_admin")
+    if r.status_code == 404:
+        raise UserNotFound(user_id)
+    r.raise_for_status()
+    return r.json().get("is_admin", False)
+
+def fetch_is_admin_many(user_ids):
+    """Interroge le service User pour plusieurs utilisateurs ; les inconnus sont absents du résultat."""
+    r = http.post(f"{config.USER_BASE_URL}/users/is_admin:batch", idempotent=True, json={"ids": user_ids})
+    r.raise_for_status()
+    return r.json()["is_admin"]
+
+admin_cache = AdminCache(
+    fetch_is_admin,
+    ttl=config.CACHE_TTL,
+    max_size=config.ADMIN_CACHE_SIZE,
+    negative_ttl=config.ADMIN_CACHE_NEGATIVE_TTL,
+    refresh_ahead=config.ADMIN_CACHE_REFRESH_AHEAD,
+    fetch_many=fetch_is_admin_many if config.ADMIN_CACHE_BATCH_WINDOW > 0 else None,
+    batch_window=config.ADMIN_CACHE_BATCH_WINDOW,
+    batch_size=config.ADMIN_CACHE_BATCH_SIZE,
+)
+
+# clés de vérification des jetons signés par le service User
+token_keys = parse_keys(config.TOKEN_KEYS)
+if config.TOKEN_ACTIVE_KID and config.TOKEN_ACTIVE_KID not in token_keys:
+    raise ValueError(f"TOKEN_ACTIVE_KID {config.TOKEN_ACTIVE_KID} is not in TOKEN_KEYS")
 
 # fonction utilitaire pour vérifier admin
 def verify_admin(user_id):
@@ -34,24 +88,16 @@ def verify_admin(user_id):
                is_admin indicates if the user has admin privileges.
                error_response is a Flask response object if verification fails.
     """
-    now = time.time()
-
-    # vérifie si on a une valeur en cache et qu'elle est encore valide
-    if user_id in user_admin_cache:
-        cached = user_admin_cache[user_id]
-        if now - cached["timestamp"] < config.CACHE_TTL:
-            return cached["is_admin"], None
-
-    # sinon appelle le microservice User
+    # jeton signé : vérifié localement
+    if is_token(user_id):
+        try:
+            return verify_token(user_id, token_keys)[1], None
+        except InvalidToken as e:
+            return False, make_response(jsonify({"error": f"Invalid token: {e}"}), 401)
     try:
-        r = requests.get(f"{config.USER_BASE_URL}/users/{user_id}/is_admin")
-        if r.status_code == 200:
-            data = r.json()
-            is_admin = data.get("is_admin", False)
-            user_admin_cache[user_id] = {"is_admin": is_admin, "timestamp": now}
-            return is_admin, None
-        else:
-            return False, make_response(jsonify({"error": "Unable to verify user"}), 401)
+        return admin_cache.get(user_id), None
+    except (UserNotFound, requests.exceptions.HTTPError):
+        return False, make_response(jsonify({"error": "Unable to verify user"}), 401)
     except requests.exceptions.RequestException:
         return False, make_response(jsonify({"error": "User service unreachable"}), 503)
 
@@ -68,16 +114,114 @@ def is_admin(user_id):
         Response: JSON response with user's ID and admin status,
                   or error if the user is not found.
     """
-    for user in users:
-        if str(user["id"]) == str(user_id):
-            print("user trouvé dans microservice User")
-            return jsonify({
-                "id": user["id"],
-                "is_admin": user["is_admin"]
-            }), 200
+    user = store.get(user_id)
+    if user is not None:
+        return jsonify({
+            "id": user["id"],
+            "is_admin": user["is_admin"]
+        }), 200
 
     return jsonify({"error": "User ID not found"}), 404
 
+def read_batch_ids():
+    """
+    Read the `ids` list of a batch request body.
+
+    Returns:
+        tuple: (list of IDs, error_response (Response or None))
+    """
+    req = request.get_json(silent=True) or {}
+    ids = req.get("ids")
+    if not isinstance(ids, list):
+        return None, make_response(jsonify({"error": "ids list required"}), 400)
+    if len(ids) > config.USER_BATCH_MAX:
+        return None, make_response(jsonify({"error": f"At most {config.USER_BATCH_MAX} ids per request"}), 400)
+    return list(dict.fromkeys(str(id) for id in ids)), None
+
+# vérifie le statut admin de plusieurs utilisateurs en une requête
+@app.route("/users/is_admin:batch", methods=['POST'])
+def is_admin_batch():
+    """
+    Check the admin status of many users at once.
+
+    Used by the admin caches of the other services to load every
+    user they miss in the same short window with a single request.
+
+    Request Body:
+        {"ids": ["user_id", ...]}
+
+    Returns:
+        Response: JSON object {"is_admin": {user_id: bool}, "not_found": [user_id]}.
+    """
+    ids, error = read_batch_ids()
+    if error:
+        return error
+    users = store.get_many(ids)
+    return jsonify({
+        "is_admin": {id: user["is_admin"] for id, user in zip(ids, users) if user is not None},
+        "not_found": [id for id, user in zip(ids, users) if user is None],
+    }), 200
+
+# retourne le profil de plusieurs utilisateurs en une requête
+@app.route("/<user_id>/users/profiles:batch", methods=['POST'])
+def profiles_batch(user_id):
+    """
+    Retrieve the profiles of many users at once (used by Booking to
+    resolve the users of a page of bookings).
+
+    Args:
+        user_id (str): ID of the requesting user, who must be an admin.
+
+    Request Body:
+        {"ids": ["user_id", ...]}
+
+    Returns:
+        Response: JSON object {"users": {user_id: user}, "not_found": [user_id]},
+                  or error if the requester is not an admin.
+    """
+    is_admin, error = verify_admin(user_id)
+    if error:
+        return error
+
+    # si pas admin -> accès interdit, comme pour un seul profil
+    if not is_admin:
+        return make_response(jsonify({"error": "Unauthorized: admin access required"}), 403)
+
+    ids, error = read_batch_ids()
+    if error:
+        return error
+    users = store.get_many(ids)
+    return jsonify({
+        "users": {id: user for id, user in zip(ids, users) if user is not None},
+        "not_found": [id for id, user in zip(ids, users) if user is None],
+    }), 200
+
+# délivre un jeton signé portant l'ID et le statut admin de l'utilisateur
+@app.route("/users/<user_id>/token", methods=['POST'])
+def issue_user_token(user_id):
+    """
+    Issue a short-lived signed token for a user.
+
+    The token can be sent instead of the raw user ID to every service,
+    which then checks the admin status locally without calling the User service.
+
+    Args:
+        user_id (str): ID of the user.
+
+    Returns:
+        Response: JSON response with the token and its lifetime in seconds,
+                  or error if the user is not found or no signing key is configured.
+    """
+    if not token_keys:
+        return make_response(jsonify({"error": "Token signing is not configured"}), 503)
+    user = store.get(user_id)
+    if user is None:
+        return make_response(jsonify({"error": "User ID not found"}), 404)
+
+    kid = config.TOKEN_ACTIVE_KID or next(iter(token_keys))
+    token = issue_token(user["id"], user["is_admin"], token_keys, kid, config.TOKEN_TTL)
+    return make_response(jsonify({"token": token, "expires_in": config.TOKEN_TTL}), 200)
+
 # page d’accueil du service
 @app.route("/", methods=['GET'])
 def home():
@@ -110,7 +254,7 @@ def get_json(user_id):
     if not is_admin:
         return make_response(jsonify({"error": "Unauthorized: admin access required"}), 403)
 
-    return jsonify(users)
+    return jsonify(store.records())
 
 # retourne un utilisateur à partir de son ID
 @app.route("/<user_id>/users/<user_id_wanted>", methods=['GET'])
@@ -134,25 +278,28 @@ def get_user_by_id(user_id, user_id_wanted):
     if not is_admin:
         return make_response(jsonify({"error": "Unauthorized: admin access required"}), 403)
 
-    for user in users:
-        if str(user["id"]) == str(user_id_wanted):
-            return jsonify(user), 200
+    user = store.get(user_id_wanted)
+    if user is not None:
+        return jsonify(user), 200
     return jsonify({"error": "User ID not found"}), 404
 
-# retourne un utilisateur à partir de son nom
+# retourne les utilisateurs qui portent un nom
 @app.route("/<user_id>/users/by_name", methods=['GET'])
 def get_user_by_name(user_id):
     """
-    Retrieve a user by their name.
+    Retrieve the users with a given name.
+
+    The name is compared after normalization (case, accents and extra
+    whitespace are ignored), through the name index of the store.
 
     Args:
         user_id (str): ID of the requesting user.
 
     Query Parameters:
-        name (str): Name of the user to search for.
+        name (str): Name of the users to search for.
 
     Returns:
-        Response: JSON response with user details if found and requester is admin,
+        Response: JSON list of every matching user if requester is admin,
                   otherwise an error message.
     """
     is_admin, error = verify_admin(user_id)
@@ -163,18 +310,14 @@ def get_user_by_name(user_id):
     if not is_admin:
         return make_response(jsonify({"error": "Unauthorized: admin access required"}), 403)
 
-    json_res = ""
-    if request.args:
-        req = request.args
-        for user in users:
-            if str(user["name"]) == str(req["name"]):
-                json_res = user
+    name = request.args.get("name")
+    if name is None:
+        return make_response(jsonify({"error": "name query parameter required"}), 400)
 
-    if not json_res:
-        res = make_response(jsonify({"error": "User name not found"}), 500)
-    else:
-        res = make_response(jsonify(json_res), 200)
-    return res
+    users = store.find("name", normalize_name(name))
+    if not users:
+        return make_response(jsonify({"error": "User name not found"}), 500)
+    return make_response(jsonify(users), 200)
 
 # récupère les noms des utilisateurs qui ont une réservation d'un film pour une certaine date
 @app.route("/<user_id>/users/bookings", methods=["GET"])
@@ -185,11 +328,10 @@ def get_users_from_booking(user_id):
     Args:
         user_id (str): ID of the requesting user.
 
-    Request Body:
-        {
-            "date": "YYYY-MM-DD",
-            "movie": "movie_id"
-        }
+    Query Parameters:
+        date (str): YYYY-MM-DD.
+        movie (str): movie ID.
+    Both may also be given in the JSON request body, as before.
 
     Returns:
         Response: JSON list of user names who booked the movie,
@@ -203,54 +345,47 @@ def get_users_from_booking(user_id):
     if not is_admin:
         return make_response(jsonify({"error": "Unauthorized: admin access required"}), 403)
 
-    req = request.get_json()
-    date = req.get("date")
-    movie_id = req.get("movie")
-    user_list = []
-    
+    req = request.get_json(silent=True) or {}
+    date = request.args.get("date", req.get("date"))
+    movie_id = request.args.get("movie", req.get("movie"))
+    if not date or not movie_id:
+        return make_response(jsonify({"error": "date and movie are required"}), 400)
+
+    # Booking ne renvoie que les IDs des utilisateurs de la séance (index (date, film)),
+    # les noms sont lus dans le stockage local
     query = """
-    query($user_id: String!) {
-      bookings_json(user_id: $user_id) {
-        userid {
-          id
-          name
-          last_active
-          is_admin
-        }
-        dates {
-          date
-          movies {
-            id
-            title
-          }
-        }
-      }
+    query($user_id: String!, $date: String!, $movieid: String!) {
+      users_for_showing(user_id: $user_id, date: $date, movieid: $movieid)
     }
     """
-    variables = {"user_id": user_id}
-
-    r = requests.post(
-        f"{config.BOOKING_BASE_URL}/graphql",
-        json={"query": query, "variables": variables}
-    )
-    
-    data = r.json().get("data", {}).get("bookings_json", [])
-    
-    for b in data:
-        for d in b["dates"]:
-            if d["date"] == date:
-                for m in d["movies"]:
-                    if m["id"] == movie_id:
-                        name = b["userid"]["name"]
-                        if not name:
-                            return make_response(jsonify({"error": "The user does not exist"}), 404)
-                        user_list.append(name)
-
-    if not user_list:
+    variables = {"user_id": user_id, "date": date, "movieid": movie_id}
+
+    try:
+        r = http.post(
+            f"{config.BOOKING_BASE_URL}/graphql",
+            idempotent=True,
+            json={"query": query, "variables": variables}
+        )
+    except requests.exceptions.RequestException:
+        return make_response(jsonify({"error": "Booking service unreachable"}), 503)
+
+    # erreur de Booking (5xx, réponse invalide, erreur GraphQL) : ce n'est pas une séance sans réservation
+    try:
+        body = r.json()
+        ids = body["data"]["users_for_showing"]
+    except (ValueError, KeyError, TypeError):
+        ids = None
+    if r.status_code != 200 or ids is None or body.get("errors"):
+        return make_response(jsonify({"error": "Booking service error"}), 502)
+    if not ids:
         return make_response(jsonify({"error": "No bookings found for the given date and movie"}), 404)
-    
+
+    users = store.get_many(ids)
+    if any(user is None for user in users):
+        return make_response(jsonify({"error": "The user does not exist"}), 404)
+
     return make_response(jsonify({
-        "users": user_list
+        "users": [user["name"] for user in users]
     }), 200)
 
 # ajoute un utilisateur
@@ -280,12 +415,12 @@ def add_user(user_id, user_id_wanted):
 
     req = request.get_json()
 
-    for user in users:
-        if str(user["id"]) == str(user_id_wanted):
-            return make_response(jsonify({"error": "User ID already exists"}), 500)
+    if store.get(user_id_wanted) is not None:
+        return make_response(jsonify({"error": "User ID already exists"}), 500)
 
-    users.append(req)
-    write(users)
+    # l'ID de l'URL fait foi : c'est la clé de l'enregistrement dans le journal
+    req["id"] = user_id_wanted
+    store.put(req)
     return make_response(jsonify({"message": "User added"}), 200)
 
 # modifie le nom de l'utilisateur à partir de son ID
@@ -311,11 +446,12 @@ def update_user_name(user_id, user_id_wanted, name):
     if not is_admin:
         return make_response(jsonify({"error": "Unauthorized: admin access required"}), 403)
 
-    for user in users:
-        if str(user["id"]) == str(user_id_wanted):
-            user["name"] = name
-            write(users)
-            return make_response(jsonify(user), 200)
+    user = store.get(user_id_wanted)
+    if user is not None:
+        # nouvelle version de l'enregistrement : l'ancienne reste intacte pour les lectures en cours
+        user = dict(user, name=name)
+        store.put(user)
+        return make_response(jsonify(user), 200)
 
     return make_response(jsonify({"error": "user ID not found"}), 500)
 
@@ -341,13 +477,36 @@ def delete_user(user_id, user_id_wanted):
     if not is_admin:
         return make_response(jsonify({"error": "Unauthorized: admin access required"}), 403)
 
-    for user in users:
-        if str(user["id"]) == str(user_id_wanted):
-            users.remove(user)
-            write(users)
-            return make_response(jsonify(user), 200)
+    user = store.get(user_id_wanted)
+    if user is not None:
+        store.delete(user["id"])
+        admin_cache.invalidate(user["id"])
+        return make_response(jsonify(user), 200)
 
     return make_response(jsonify({"error": "user ID not found"}), 500)
 
+# compteurs du cache de vérification admin
+@app.route("/admin_cache", methods=['GET'])
+def admin_cache_stats():
+    """
+    Hit/miss/eviction counters of the admin verification cache.
+
+    Returns:
+        Response: JSON object with the cache counters.
+    """
+    return jsonify(admin_cache.stats()), 200
+
+# compteurs du client HTTP vers les autres services
+@app.route("/http_client", methods=['GET'])
+def http_client_stats():
+    """
+    Per-host counters of the inter-service HTTP client (requests, retries,
+    errors, in-flight requests and pool saturation).
+
+    Returns:
+        Response: JSON object keyed by host.
+    """
+    return jsonify(http.stats()), 200
+
 if __name__ == "__main__":
     app.run(host=config.USER_HOST, port=config.USER_PORT, debug=True)